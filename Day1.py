@@ -1,3 +1,46 @@
+import mmap
+import os
+import time
+import numpy as np
+
+def read_chunks(filename, chunk_size=2**20, use_mmap=False):
+    """
+    Generator which reads an input file in fixed-size byte chunks, so that arbitrarily large
+    files can be processed with bounded memory.
+
+    Parameters
+    ----------
+    filename : str
+        Input file to be read.
+    chunk_size : int, optional
+        Number of bytes in each chunk.
+        The default is 2**20.
+    use_mmap : bool, optional
+        Whether to memory-map the file rather than reading it through a buffered file object.
+        The default is False.
+
+    Yields
+    ------
+    chunk : bytes
+        The next chunk of the file.
+
+    """
+    with open(filename, 'rb') as file:
+        if use_mmap:
+            try:
+                mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # empty files cannot be memory-mapped
+                return
+            with mapped:
+                for start in range(0, len(mapped), chunk_size):
+                    yield mapped[start:start+chunk_size]
+        else:
+            chunk = file.read(chunk_size)
+            while chunk:
+                yield chunk
+                chunk = file.read(chunk_size)
+
 def Day1_Part1(filename='Inputs/Day1_Inputs.txt'):
     """
     Calculate the floor reached at the end of a series of instructions given in an input
@@ -62,4 +105,485 @@ def Day1_Part2(filename='Inputs/Day1_Inputs.txt'):
         if floor == -1:
             position = n+1
             return position
-        
\ No newline at end of file
+        
+
+
+def Day1_Stream(filename='Inputs/Day1_Inputs.txt', chunk_size=2**20, use_mmap=False):
+    """
+    Calculate both the final floor and the position of the instruction which first causes the
+    floor to become -1 in a single streaming pass over an input file of instructions, where '('
+    means go up a floor and ')' means go down a floor, starting at floor 0. The file is read in
+    fixed-size chunks so memory use is bounded regardless of the file size.
+
+    Parameters
+    ----------
+    filename : str, optional
+        Input file providing the instructions.
+        The default is 'Inputs/Day1_Inputs.txt'.
+    chunk_size : int, optional
+        Number of bytes read at a time.
+        The default is 2**20.
+    use_mmap : bool, optional
+        Whether to use memory-mapped I/O to read the file.
+        The default is False.
+
+    Returns
+    -------
+    floor : int
+        Final floor number.
+    position : int or None
+        Position of the first instruction which causes the floor to go below 0, or None if
+        the floor never goes below 0.
+    report : dict
+        Throughput report giving the number of 'bytes' read, the elapsed 'seconds' and the
+        throughput in 'bytes_per_sec'.
+
+    """
+    start = time.perf_counter()
+    floor = 0
+    position = None
+    n_bytes = 0
+    for chunk in read_chunks(filename, chunk_size, use_mmap):
+        ups, downs = chunk.count(b'('), chunk.count(b')')
+        # only walk the chunk if it contains enough ')' to possibly reach the basement
+        if position is None and floor - downs <= -1:
+            walk = floor
+            for n, char in enumerate(chunk):
+                if char == 40:
+                    walk += 1
+                elif char == 41:
+                    walk -= 1
+                    if walk == -1:
+                        position = n_bytes + n + 1
+                        break
+        floor += ups - downs
+        n_bytes += len(chunk)
+    seconds = time.perf_counter() - start
+
+    report = {'bytes' : n_bytes, 'seconds' : seconds,
+              'bytes_per_sec' : n_bytes/seconds if seconds > 0 else float('inf')}
+
+    return floor, position, report
+
+# lookup table mapping each byte to its change in floor
+FLOOR_STEPS = np.zeros(256, dtype=np.int8)
+FLOOR_STEPS[ord('(')] = 1
+FLOOR_STEPS[ord(')')] = -1
+
+def first_floor_positions(filename='Inputs/Day1_Inputs.txt', targets=(-1,), chunk_size=2**22,
+                          use_mmap=False):
+    """
+    Calculate the position of the instruction which first causes the floor to reach each of a
+    set of target floors, using a vectorised prefix sum over chunks of an input file of
+    instructions, where '(' means go up a floor and ')' means go down a floor, starting at floor
+    0. Since every instruction changes the floor by at most one, the floor first reaches K > 0
+    when the running maximum first reaches K (and similarly for K < 0 with the running minimum),
+    so all targets are answered with a single binary search per chunk.
+
+    Parameters
+    ----------
+    filename : str, optional
+        Input file providing the instructions.
+        The default is 'Inputs/Day1_Inputs.txt'.
+    targets : iterable of int, optional
+        The floors to find the first positions of.
+        The default is (-1,).
+    chunk_size : int, optional
+        Number of bytes processed at a time.
+        The default is 2**22.
+    use_mmap : bool, optional
+        Whether to use memory-mapped I/O to read the file.
+        The default is False.
+
+    Returns
+    -------
+    positions : dict(int : int or None)
+        The position of the first instruction which causes the floor to reach each target, or
+        None if the target is never reached. Floor 0 is reached at position 0.
+
+    """
+    positions = {int(k) : None for k in targets}
+    if 0 in positions:
+        positions[0] = 0
+    up = np.array(sorted(k for k in positions if k > 0), dtype=np.int64)
+    down = np.array(sorted((-k for k in positions if k < 0)), dtype=np.int64)
+
+    offset, highest, lowest, n_bytes = 0, 0, 0, 0
+    for chunk in read_chunks(filename, chunk_size, use_mmap):
+        floors = np.cumsum(FLOOR_STEPS[np.frombuffer(chunk, dtype=np.uint8)], dtype=np.int64)
+        floors += offset
+
+        for sign, remaining, extreme in [(1, up, highest), (-1, down, -lowest)]:
+            if len(floors) == 0 or len(remaining) == 0 or remaining[-1] <= extreme:
+                continue
+            # targets which are first reached in this chunk
+            running = np.maximum.accumulate(sign*floors)
+            new = remaining[(remaining > extreme) & (remaining <= running[-1])]
+            for k, index in zip(new, np.searchsorted(running, new)):
+                positions[int(sign*k)] = n_bytes + int(index) + 1
+
+        if len(floors):
+            highest = max(highest, int(floors.max()))
+            lowest = min(lowest, int(floors.min()))
+            offset = int(floors[-1])
+        n_bytes += len(chunk)
+
+    return positions
+
+def Day1_Part2_numpy(filename='Inputs/Day1_Inputs.txt', chunk_size=2**22, use_mmap=False):
+    """
+    Calculate the position of the instruction which first causes the floor to become -1, using
+    the vectorised prefix-sum search in first_floor_positions.
+
+    Parameters
+    ----------
+    filename : str, optional
+        Input file providing the instructions.
+        The default is 'Inputs/Day1_Inputs.txt'.
+    chunk_size : int, optional
+        Number of bytes processed at a time.
+        The default is 2**22.
+    use_mmap : bool, optional
+        Whether to use memory-mapped I/O to read the file.
+        The default is False.
+
+    Returns
+    -------
+    position : int or None
+        Position of the first instruction which causes the floor to go below 0.
+
+    """
+    position = first_floor_positions(filename, (-1,), chunk_size, use_mmap)[-1]
+
+    return position
+
+class FloorIndex:
+    """
+    Class providing a precomputed index over the floor history of an instruction stream, which
+    answers queries about the floor at a position, the first visit to a floor and the minimum or
+    maximum floor over a range of positions without rescanning the instructions.
+
+    Range queries use a block decomposition: a sparse table over the minimum and maximum of each
+    block of positions answers the whole blocks of a range, and the partial blocks at either end
+    are scanned directly, so the index stays O(n) in size.
+    """
+    def __init__(self, floors, block_size=2**10):
+        """
+        Initialise the class with two parameters, building the block sparse tables and the
+        first-visit table from the prefix sums.
+
+        Parameters
+        ----------
+        floors : numpy.ndarray of int
+            The floor after each number of instructions, starting with floor 0 at position 0 and
+            changing by one floor at each position.
+        block_size : int, optional
+            The number of positions in each block of the range tables.
+            The default is 2**10.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.floors = np.asarray(floors)
+        self.block_size = block_size
+        n_blocks = -(-len(self.floors)//block_size)
+        padded = np.empty(n_blocks*block_size, dtype=self.floors.dtype)
+        padded[:len(self.floors)] = self.floors
+        padded[len(self.floors):] = self.floors[-1]
+        blocks = padded.reshape(n_blocks, block_size)
+        self.block_mins = self.sparse_table(blocks.min(axis=1), np.minimum)
+        self.block_maxs = self.sparse_table(blocks.max(axis=1), np.maximum)
+
+        # the floor changes by one at a time, so the floors visited are exactly lowest to
+        # highest, and each is first reached when the running extreme reaches it
+        highest = np.maximum.accumulate(self.floors)
+        deepest = np.maximum.accumulate(-self.floors)
+        self.lowest = -int(deepest[-1])
+        self.first = np.concatenate([np.searchsorted(deepest, np.arange(-self.lowest, 0, -1)),
+                                     np.searchsorted(highest, np.arange(int(highest[-1]) + 1))])
+
+    def __repr__(self):
+        """
+        Return the representation of a FloorIndex object.
+
+        Returns
+        -------
+        str
+            Representation.
+
+        """
+        return f'{self.__class__.__name__}({len(self.floors) - 1} instructions)'
+
+    @staticmethod
+    def sparse_table(values, reduce):
+        """
+        Builds a sparse table over an array, in which row k holds the reduction of each run of
+        2**k values (clipped at the end of the array).
+
+        Parameters
+        ----------
+        values : numpy.ndarray of int
+            The values to build the table over.
+        reduce : numpy.ufunc
+            The reduction to apply, e.g. numpy.minimum.
+
+        Returns
+        -------
+        table : numpy.ndarray of int
+            The sparse table, with shape (number of levels, len(values)).
+
+        """
+        table = [values]
+        width = 1
+        while 2*width <= len(values):
+            level = table[-1].copy()
+            reduce(level[:-width], table[-1][width:], out=level[:-width])
+            table.append(level)
+            width *= 2
+
+        return np.stack(table)
+
+    @classmethod
+    def build(cls, filename='Inputs/Day1_Inputs.txt', chunk_size=2**22):
+        """
+        Build the index by scanning an input file of instructions once.
+
+        Parameters
+        ----------
+        filename : str, optional
+            Input file providing the instructions.
+            The default is 'Inputs/Day1_Inputs.txt'.
+        chunk_size : int, optional
+            Number of bytes processed at a time.
+            The default is 2**22.
+
+        Returns
+        -------
+        FloorIndex
+            The index over the instructions in the file.
+
+        """
+        size = os.path.getsize(filename)
+        floors = np.zeros(size + 1, dtype=np.int32 if size < 2**31 else np.int64)
+        n = 0
+        offset = 0
+        for chunk in read_chunks(filename, chunk_size):
+            steps = FLOOR_STEPS[np.frombuffer(chunk, dtype=np.uint8)]
+            # ignore bytes which are not instructions, e.g. the trailing newline
+            steps = steps[steps != 0]
+            np.cumsum(steps, out=floors[n+1:n+1+len(steps)])
+            floors[n+1:n+1+len(steps)] += offset
+            n += len(steps)
+            offset = int(floors[n])
+
+        return cls(floors[:n+1])
+
+    @staticmethod
+    def index_path(filename):
+        """
+        Returns the path of the directory in which the index for a given input file is stored.
+
+        Parameters
+        ----------
+        filename : str
+            Input file providing the instructions.
+
+        Returns
+        -------
+        str
+            Path of the saved index.
+
+        """
+        return filename + '.floorindex'
+
+    def save(self, filename='Inputs/Day1_Inputs.txt'):
+        """
+        Save the index next to the input file it was built from. The floors and first-visit
+        table are stored as separate .npy files so that they can be memory-mapped on loading.
+
+        Parameters
+        ----------
+        filename : str, optional
+            Input file the index was built from.
+            The default is 'Inputs/Day1_Inputs.txt'.
+
+        Returns
+        -------
+        None.
+
+        """
+        path = self.index_path(filename)
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, 'floors.npy'), self.floors)
+        np.save(os.path.join(path, 'first.npy'), self.first)
+        # written last, so that an interrupted save is never mistaken for a complete one
+        with open(os.path.join(path, 'blocks.npz'), 'wb') as file:
+            np.savez(file, block_mins=self.block_mins, block_maxs=self.block_maxs,
+                     block_size=self.block_size, lowest=self.lowest,
+                     source_mtime=os.path.getmtime(filename))
+
+    @classmethod
+    def load(cls, filename='Inputs/Day1_Inputs.txt', chunk_size=2**22):
+        """
+        Load the saved index for an input file, building and saving it first if it does not
+        exist or is older than the input file. The floors and first-visit table are
+        memory-mapped rather than read into memory.
+
+        Parameters
+        ----------
+        filename : str, optional
+            Input file providing the instructions.
+            The default is 'Inputs/Day1_Inputs.txt'.
+        chunk_size : int, optional
+            Number of bytes processed at a time if the index needs building.
+            The default is 2**22.
+
+        Returns
+        -------
+        FloorIndex
+            The index over the instructions in the file.
+
+        """
+        path = cls.index_path(filename)
+        if os.path.exists(os.path.join(path, 'blocks.npz')):
+            with np.load(os.path.join(path, 'blocks.npz')) as saved:
+                if float(saved['source_mtime']) == os.path.getmtime(filename):
+                    index = cls.__new__(cls)
+                    index.floors = np.load(os.path.join(path, 'floors.npy'), mmap_mode='r')
+                    index.first = np.load(os.path.join(path, 'first.npy'), mmap_mode='r')
+                    index.block_mins = saved['block_mins']
+                    index.block_maxs = saved['block_maxs']
+                    index.block_size = int(saved['block_size'])
+                    index.lowest = int(saved['lowest'])
+                    return index
+
+        index = cls.build(filename, chunk_size)
+        index.save(filename)
+        return index
+
+    def floor_at(self, position):
+        """
+        Returns the floor reached after a given number of instructions.
+
+        Parameters
+        ----------
+        position : int
+            The number of instructions followed.
+
+        Raises
+        ------
+        Exception
+            Position outside the instructions.
+
+        Returns
+        -------
+        int
+            The floor at that position.
+
+        """
+        if not 0 <= position < len(self.floors):
+            raise Exception(f'Invalid position: {position}')
+        return int(self.floors[position])
+
+    def first_visit(self, floor):
+        """
+        Returns the position of the instruction which first causes a given floor to be reached.
+
+        Parameters
+        ----------
+        floor : int
+            The floor to find the first visit to.
+
+        Returns
+        -------
+        int or None
+            The position of the first visit, or None if the floor is never reached.
+
+        """
+        if not 0 <= floor - self.lowest < len(self.first):
+            return None
+        return int(self.first[floor - self.lowest])
+
+    def _query(self, table, reduce, start, stop):
+        """
+        Applies a block decomposed range query over the positions start to stop inclusive,
+        reducing the whole blocks in the range with the sparse table and scanning the partial
+        blocks at either end directly.
+
+        Parameters
+        ----------
+        table : numpy.ndarray of int
+            The sparse table over the blocks, see sparse_table.
+        reduce : numpy.ufunc
+            The reduction the table was built with, e.g. numpy.minimum.
+        start : int
+            The first position in the range.
+        stop : int
+            The last position in the range.
+
+        Raises
+        ------
+        Exception
+            Invalid range.
+
+        Returns
+        -------
+        int
+            The reduction of the floors over the range.
+
+        """
+        if not 0 <= start <= stop < len(self.floors):
+            raise Exception(f'Invalid range: {start} to {stop}')
+        first_block = -(-start//self.block_size)
+        last_block = (stop + 1)//self.block_size
+        if first_block >= last_block:
+            return int(reduce.reduce(self.floors[start:stop+1]))
+
+        # whole blocks from the sparse table, partial blocks at either end scanned directly
+        level = int(last_block - first_block).bit_length() - 1
+        result = reduce(table[level][first_block], table[level][last_block - 2**level])
+        if start < first_block*self.block_size:
+            result = reduce(result, reduce.reduce(self.floors[start:first_block*self.block_size]))
+        if stop >= last_block*self.block_size:
+            result = reduce(result, reduce.reduce(self.floors[last_block*self.block_size:stop+1]))
+        return int(result)
+
+    def range_min(self, start, stop):
+        """
+        Returns the minimum floor reached between two positions (inclusive).
+
+        Parameters
+        ----------
+        start : int
+            The first position in the range.
+        stop : int
+            The last position in the range.
+
+        Returns
+        -------
+        int
+            The minimum floor in the range.
+
+        """
+        return self._query(self.block_mins, np.minimum, start, stop)
+
+    def range_max(self, start, stop):
+        """
+        Returns the maximum floor reached between two positions (inclusive).
+
+        Parameters
+        ----------
+        start : int
+            The first position in the range.
+        stop : int
+            The last position in the range.
+
+        Returns
+        -------
+        int
+            The maximum floor in the range.
+
+        """
+        return self._query(self.block_maxs, np.maximum, start, stop)
@@ -1,29 +1,58 @@
-def totalHappiness(arrangement, pairings):
+from graph import WeightedGraph
+
+def read_happiness(filename='Inputs/Day13_Inputs.txt'):
     """
-    Calculates the total happiness of an arrangement of members given the happiness gained/lost
-    by each person depending on who they are next to.
+    Reads the happiness gained/lost by each member when seated next to every other member from
+    an input file into a graph.
 
     Parameters
     ----------
-    arrangement : list of str
-        List of members in a given arrangement.
-    pairings : dict(str : dict(str : int))
-        The happiness of each member when seated next to every other member.
+    filename : str, optional
+        Input file containing the happiness of each pairing.
+        The default is 'Inputs/Day13_Inputs.txt'.
 
     Returns
     -------
-    happiness : int
-        The total happiness of the group in the given arrangement.
+    WeightedGraph
+        The graph of the members, where the weight from one member to another is the happiness
+        of the first when seated next to the second, and 0 where none is given.
 
     """
-    happiness = 0
-    for i in range(len(arrangement)):
-        happiness += pairings[arrangement[i]][arrangement[(i+1)%len(arrangement)]]
-        happiness += pairings[arrangement[(i+1)%len(arrangement)]][arrangement[i]]
+    file = open(filename)
+    pairings = []
+    for line in file:
+        line = line.strip().split()
+        if len(line) > 0:
+            pairings.append((line[0], line[-1][:-1], int(line[3])*(1 - (2*(line[2] == 'lose')))))
+    file.close()
 
-    return happiness
+    return WeightedGraph.from_edges(pairings, fill=0)
 
-from itertools import permutations
+def optimal_arrangement(graph):
+    """
+    Finds the seating arrangement of members around a circular table which maximises the total
+    happiness of the group. Both neighbours' happiness counts for each pair, and rotations of the
+    table are equivalent, so the last member is kept in the last seat.
+
+    Parameters
+    ----------
+    graph : WeightedGraph
+        The happiness of each member when seated next to every other member.
+
+    Returns
+    -------
+    opt_arrangement : list of str
+        The optimum arrangement of members which maximises the happiness of the group.
+    opt_happiness : int
+        The total happiness of the group in the optimal arrangement.
+
+    """
+    opt_arrangement, opt_happiness = graph.symmetrised().best_route(longest=True, closed=True,
+                                                                    fixed_last=len(graph) - 1)
+    opt_arrangement = [graph.names[i] for i in opt_arrangement]
+    opt_happiness = int(opt_happiness)
+
+    return opt_arrangement, opt_happiness
 
 def Day13_Part1(filename='Inputs/Day13_Inputs.txt'):
     """
@@ -45,27 +74,9 @@ def Day13_Part1(filename='Inputs/Day13_Inputs.txt'):
         The total happiness of the group in the optimal arrangement.
 
     """
-    file = open(filename)
-    pairings = {}
-    for line in file:
-        line = line.strip().split()
-        if len(line) > 0:
-            if line[0] in pairings:
-                pairings[line[0]][line[-1][:-1]] = int(line[3])*(1 - (2*(line[2] == 'lose')))
-            else:
-                pairings[line[0]] = {line[-1][:-1] : int(line[3])*(1 - (2*(line[2] == 'lose')))}
-    file.close()
+    graph = read_happiness(filename)
 
-    lastSeat = list(pairings.keys())[-1]
-    opt_arrangement, opt_happiness = None, 0
-
-    for arrangement in permutations(list(pairings.keys())[:-1]):
-        arrangement = list(arrangement)
-        arrangement.append(lastSeat)
-        happiness = totalHappiness(arrangement, pairings)
-        if opt_arrangement == None or happiness > opt_happiness:
-            opt_arrangement = arrangement.copy()
-            opt_happiness = 1*happiness
+    opt_arrangement, opt_happiness = optimal_arrangement(graph)
 
     return opt_arrangement, opt_happiness
 
@@ -90,31 +101,9 @@ def Day13_Part2(filename='Inputs/Day13_Inputs.txt'):
         The total happiness of the group in the optimal arrangement.
 
     """
-    file = open(filename)
-    pairings = {}
-    for line in file:
-        line = line.strip().split()
-        if len(line) > 0:
-            if line[0] in pairings:
-                pairings[line[0]][line[-1][:-1]] = int(line[3])*(1 - (2*(line[2] == 'lose')))
-            else:
-                pairings[line[0]] = {line[-1][:-1] : int(line[3])*(1 - (2*(line[2] == 'lose')))}
-    file.close()
+    graph = read_happiness(filename)
+    graph.intern('Me')
 
-    me_dict = {key:0 for key in pairings.keys()}
-    for key in pairings.keys():
-        pairings[key]['Me'] = 0
-    pairings['Me'] = me_dict.copy()
-
-    lastSeat = list(pairings.keys())[-1]
-    opt_arrangement, opt_happiness = None, 0
-
-    for arrangement in permutations(list(pairings.keys())[:-1]):
-        arrangement = list(arrangement)
-        arrangement.append(lastSeat)
-        happiness = totalHappiness(arrangement, pairings)
-        if opt_arrangement == None or happiness > opt_happiness:
-            opt_arrangement = arrangement.copy()
-            opt_happiness = 1*happiness
+    opt_arrangement, opt_happiness = optimal_arrangement(graph)
 
     return opt_arrangement, opt_happiness
@@ -1,4 +1,88 @@
 import numpy as np
+from itertools import islice
+from multiprocessing import Pool
+from parallel import bounded_imap
+
+def load_dimensions(filename='Inputs/Day2_Inputs.txt'):
+    """
+    Loads the dimensions of every present from an input file of 'LxWxH' lines into a contiguous
+    (N, 3) array, parsing the whole file in one bulk operation rather than line by line.
+
+    Parameters
+    ----------
+    filename : str, optional
+        Input file giving the dimensions of every present.
+        The default is 'Inputs/Day2_Inputs.txt'.
+
+    Raises
+    ------
+    Exception
+        The file does not contain a whole number of dimension triples.
+
+    Returns
+    -------
+    dimensions : numpy.ndarray of int32
+        The dimensions of every present, one present per row.
+
+    """
+    with open(filename) as file:
+        text = file.read()
+
+    return parse_dimensions(text)
+
+def parse_dimensions(text):
+    """
+    Parses a block of 'LxWxH' lines into a contiguous (N, 3) int32 array.
+
+    Parameters
+    ----------
+    text : str
+        Lines of present dimensions.
+
+    Raises
+    ------
+    Exception
+        The text does not contain a whole number of dimension triples.
+
+    Returns
+    -------
+    dimensions : numpy.ndarray of int32
+        The dimensions of every present, one present per row.
+
+    """
+    values = np.fromstring(text.replace('x', ' '), dtype=np.int32, sep=' ')
+    if len(values) % 3 != 0:
+        raise Exception('Dimensions are not all of the form LxWxH')
+    dimensions = values.reshape(-1, 3)
+
+    return dimensions
+
+def package_totals(dimensions):
+    """
+    Calculates the total area of wrapping paper and total length of ribbon required for a set of
+    presents in one pass, sorting the dimensions of each present once so that the smallest side
+    is always given by the first two dimensions. The array is sorted in place.
+
+    Parameters
+    ----------
+    dimensions : numpy.ndarray of int
+        The dimensions of every present, one present per row.
+
+    Returns
+    -------
+    total_area : int
+        Total area of wrapping paper required.
+    total_length : int
+        Total length of ribbon required.
+
+    """
+    dimensions.sort(axis=1)
+    a, b, c = (dimensions[:, i].astype(np.int64) for i in range(3))
+    ab = a*b
+    total_area = int(np.sum(3*ab + 2*c*(a + b)))
+    total_length = int(np.sum(2*(a + b) + ab*c))
+
+    return total_area, total_length
 
 def Day2_Part1(filename='Inputs/Day2_Inputs.txt'):
     """
@@ -18,17 +102,7 @@ def Day2_Part1(filename='Inputs/Day2_Inputs.txt'):
         Total area of wrapping paper required.
 
     """
-    file = open(filename)
-    dimensions = []
-    for line in file:
-        line = line.strip().split()
-        if len(line) > 0:
-            dimensions.append([int(i) for i in line[0].split('x')])
-    file.close()
-
-    d = np.array(dimensions)
-    faces = np.array([d[:, indices[0]]*d[:, indices[1]] for indices in [[0, 1], [0, 2], [1, 2]]]).T
-    total_area  = np.sum(2*np.sum(faces, axis=1) + np.min(faces, axis=1))
+    total_area = package_totals(load_dimensions(filename))[0]
 
     return total_area
 
@@ -50,16 +124,116 @@ def Day2_Part2(filename='Inputs/Day2_Inputs.txt'):
         Total length of ribbon required.
 
     """
-    file = open(filename)
-    dimensions = []
-    for line in file:
-        line = line.strip().split()
-        if len(line) > 0:
-            dimensions.append([int(i) for i in line[0].split('x')])
-    file.close()
-
-    d = np.array(dimensions)
-    perimeters = np.array([2*(d[:, indices[0]] + d[:, indices[1]]) for indices in [[0, 1], [0, 2], [1, 2]]]).T
-    total_length  = np.sum(np.min(perimeters, axis=1) + np.product(d, axis=1))
+    total_length = package_totals(load_dimensions(filename))[1]
             
     return total_length
+
+def read_blocks(filename='Inputs/Day2_Inputs.txt', block_lines=2**20):
+    """
+    Generator which reads an input file of present dimensions in blocks of a bounded number of
+    lines, so that manifests larger than memory can be processed.
+
+    Parameters
+    ----------
+    filename : str, optional
+        Input file giving the dimensions of every present.
+        The default is 'Inputs/Day2_Inputs.txt'.
+    block_lines : int, optional
+        Maximum number of lines in each block.
+        The default is 2**20.
+
+    Yields
+    ------
+    block : str
+        The next block of lines.
+
+    """
+    with open(filename) as file:
+        block = ''.join(islice(file, block_lines))
+        while block:
+            yield block
+            block = ''.join(islice(file, block_lines))
+
+def block_totals(block):
+    """
+    Calculates the partial wrapping paper area and ribbon length for one block of lines of
+    present dimensions.
+
+    Parameters
+    ----------
+    block : str
+        Lines of present dimensions.
+
+    Returns
+    -------
+    total_area : int
+        Area of wrapping paper required for the presents in the block.
+    total_length : int
+        Length of ribbon required for the presents in the block.
+
+    """
+    return package_totals(parse_dimensions(block))
+
+def Day2_Blocks(filename='Inputs/Day2_Inputs.txt', block_lines=2**20, processes=None):
+    """
+    Generator giving the partial wrapping paper area and ribbon length for each block of an input
+    file of present dimensions, in file order. Blocks can be evaluated in parallel across a pool
+    of processes.
+
+    Parameters
+    ----------
+    filename : str, optional
+        Input file giving the dimensions of every present.
+        The default is 'Inputs/Day2_Inputs.txt'.
+    block_lines : int, optional
+        Maximum number of lines in each block.
+        The default is 2**20.
+    processes : int or None, optional
+        Number of worker processes to use, or None to evaluate every block in this process.
+        The default is None.
+
+    Yields
+    ------
+    partial : tuple of int
+        The wrapping paper area and ribbon length for the next block.
+
+    """
+    blocks = read_blocks(filename, block_lines)
+    if processes is None:
+        yield from map(block_totals, blocks)
+    else:
+        with Pool(processes) as pool:
+            yield from bounded_imap(pool, block_totals, blocks, 2*processes)
+
+def Day2_Stream(filename='Inputs/Day2_Inputs.txt', block_lines=2**20, processes=None):
+    """
+    Calculate the total area of wrapping paper and total length of ribbon required to wrap all of
+    the presents in an input file, reducing running totals over bounded-size blocks so that the
+    whole manifest never needs to be held in memory.
+
+    Parameters
+    ----------
+    filename : str, optional
+        Input file giving the dimensions of every present.
+        The default is 'Inputs/Day2_Inputs.txt'.
+    block_lines : int, optional
+        Maximum number of lines in each block.
+        The default is 2**20.
+    processes : int or None, optional
+        Number of worker processes to use, or None to evaluate every block in this process.
+        The default is None.
+
+    Returns
+    -------
+    total_area : int
+        Total area of wrapping paper required.
+    total_length : int
+        Total length of ribbon required.
+
+    """
+    total_area, total_length = 0, 0
+    for area, length in Day2_Blocks(filename, block_lines, processes):
+        total_area += area
+        total_length += length
+
+    return total_area, total_length
@@ -1,9 +1,56 @@
 import shlex
+import numpy as np
+
+# offset making both 32-bit halves of a packed key non-negative
+KEY_OFFSET = 2**31
+ORIGIN_KEY = (KEY_OFFSET << 32) | KEY_OFFSET
+# change in packed key for each direction
+KEY_STEPS = {'^' : 1, '>' : 2**32, 'v' : -1, '<' : -2**32}
+MOVES = {'^' : (0, 1), '>' : (1, 0), 'v' : (0, -1), '<' : (-1, 0)}
+
+def pack_coordinates(x, y):
+    """
+    Packs a pair of coordinates, each within the signed 32-bit range, into a single 64-bit
+    integer key.
+
+    Parameters
+    ----------
+    x : int
+        The x coordinate.
+    y : int
+        The y coordinate.
+
+    Returns
+    -------
+    int
+        The packed key.
+
+    """
+    return ((x + KEY_OFFSET) << 32) | (y + KEY_OFFSET)
+
+def unpack_coordinates(key):
+    """
+    Unpacks a 64-bit integer key created by pack_coordinates into a pair of coordinates.
+
+    Parameters
+    ----------
+    key : int
+        The packed key.
+
+    Returns
+    -------
+    list of int
+        Coordinates in the form [x, y].
+
+    """
+    return [(key >> 32) - KEY_OFFSET, (key & 0xFFFFFFFF) - KEY_OFFSET]
 
 class Coordinates:
     """
     Class to define a pair of coordinates (x, y)
     """
+    __slots__ = ('x', 'y')
+
     def __init__(self, pos):
         """
         Initialise the class with one parameter.
@@ -20,6 +67,31 @@ class Coordinates:
         """
         self.x = pos[0]
         self.y = pos[1]
+
+    @classmethod
+    def from_key(cls, key):
+        """
+        Create a Coordinates object from a packed integer key.
+
+        Parameters
+        ----------
+        key : int
+            Coordinates packed by pack_coordinates.
+
+        Returns
+        -------
+        Coordinates
+            The unpacked coordinates.
+
+        """
+        return cls(unpack_coordinates(key))
+
+    @property
+    def key(self):
+        """
+        The coordinates packed into a single integer key.
+        """
+        return pack_coordinates(self.x, self.y)
     
     def __repr__(self):
         """
@@ -79,17 +151,47 @@ class Coordinates:
         """
         return not(self == other)
 
-def Day3_Part1(filename='Inputs/Day3_Inputs.txt'):
+# lookup tables giving the move in x and y for each direction byte
+DX = np.zeros(256, dtype=np.int8)
+DY = np.zeros(256, dtype=np.int8)
+VALID = np.zeros(256, dtype=bool)
+DX[[ord(direction) for direction in MOVES]] = [dx for dx, dy in MOVES.values()]
+DY[[ord(direction) for direction in MOVES]] = [dy for dx, dy in MOVES.values()]
+VALID[[ord(direction) for direction in MOVES]] = True
+
+def pack_coordinate_arrays(x, y):
     """
-    Returns the number of houses in an infinite 2D map of houses which get at least one
-    present delivered, when Santa starts at (0, 0) and moves according to a series of
-    instructions, given in an input file, delivering a present at every stop.
+    Packs arrays of coordinates, each within the signed 32-bit range, into an array of 64-bit
+    integer keys, matching pack_coordinates element-wise.
 
     Parameters
     ----------
-    filename : str, optional
-        Input file giving the directions.
-        The default is 'Inputs/Day3_Inputs.txt'.
+    x : numpy.ndarray of int
+        The x coordinates.
+    y : numpy.ndarray of int
+        The y coordinates.
+
+    Returns
+    -------
+    numpy.ndarray of uint64
+        The packed keys.
+
+    """
+    return ((x + KEY_OFFSET).astype(np.uint64) << np.uint64(32)) | (y + KEY_OFFSET).astype(np.uint64)
+
+def walk_positions(directions, deliverers=1):
+    """
+    Calculates every position of a number of deliverers who start at (0, 0) and take turns moving
+    according to a string of directions, by converting the directions into arrays of moves and
+    taking the cumulative sum of each deliverer's strided slice.
+
+    Parameters
+    ----------
+    directions : str
+        The directions, one character per move.
+    deliverers : int, optional
+        The number of deliverers taking turns.
+        The default is 1.
 
     Raises
     ------
@@ -98,8 +200,177 @@ def Day3_Part1(filename='Inputs/Day3_Inputs.txt'):
 
     Returns
     -------
-    num_houses : int
-        The number of houses which recieve at least one present.
+    positions : list of tuple of numpy.ndarray of int
+        The x and y coordinates of every stop of each deliverer, starting at (0, 0).
+
+    """
+    codes = np.frombuffer(directions.encode('ascii'), dtype=np.uint8)
+    if not VALID[codes].all():
+        raise Exception('Unknown direction!')
+
+    positions = []
+    for k in range(deliverers):
+        x = np.zeros(len(codes[k::deliverers]) + 1, dtype=np.int64)
+        y = np.zeros(len(codes[k::deliverers]) + 1, dtype=np.int64)
+        np.cumsum(DX[codes[k::deliverers]], out=x[1:])
+        np.cumsum(DY[codes[k::deliverers]], out=y[1:])
+        positions.append((x, y))
+
+    return positions
+
+class VisitHistogram:
+    """
+    Class holding the number of presents delivered to every visited house, stored sparsely in
+    coordinate (COO) form.
+    """
+    def __init__(self, x, y, counts):
+        """
+        Initialise the class with three parameters.
+
+        Parameters
+        ----------
+        x : numpy.ndarray of int
+            The x coordinate of each visited house.
+        y : numpy.ndarray of int
+            The y coordinate of each visited house.
+        counts : numpy.ndarray of int
+            The number of presents delivered to each visited house.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.x = x
+        self.y = y
+        self.counts = counts
+
+    def __repr__(self):
+        """
+        Return the representation of a VisitHistogram object.
+
+        Returns
+        -------
+        str
+            Representation.
+
+        """
+        return f'{self.__class__.__name__}({len(self.counts)} houses)'
+
+    @classmethod
+    def from_directions(cls, directions, deliverers=1):
+        """
+        Build the histogram from a single pass of a number of deliverers who start at (0, 0)
+        and take turns moving according to a string of directions.
+
+        Parameters
+        ----------
+        directions : str
+            The directions, one character per move.
+        deliverers : int, optional
+            The number of deliverers taking turns.
+            The default is 1.
+
+        Returns
+        -------
+        VisitHistogram
+            The number of presents delivered to every visited house.
+
+        """
+        keys = [pack_coordinate_arrays(x, y) for x, y in walk_positions(directions, deliverers)]
+        keys, counts = np.unique(np.concatenate(keys), return_counts=True)
+        x = (keys >> np.uint64(32)).astype(np.int64) - KEY_OFFSET
+        y = (keys & np.uint64(0xFFFFFFFF)).astype(np.int64) - KEY_OFFSET
+
+        return cls(x, y, counts)
+
+    def coo(self):
+        """
+        Returns the histogram as a sparse array in coordinate (COO) form.
+
+        Returns
+        -------
+        counts : numpy.ndarray of int
+            The number of presents delivered to each visited house.
+        coords : tuple of numpy.ndarray of int
+            The x and y coordinates of each visited house.
+
+        """
+        return self.counts, (self.x, self.y)
+
+    def dense(self):
+        """
+        Returns the histogram as a dense grid covering the bounding box of the visited houses.
+
+        Returns
+        -------
+        grid : numpy.ndarray of int
+            The number of presents delivered to each house, indexed as grid[x - x_min, y - y_min].
+        origin : tuple of int
+            The coordinates (x_min, y_min) of the house at grid[0, 0].
+
+        """
+        x_min, y_min = int(self.x.min()), int(self.y.min())
+        grid = np.zeros((int(self.x.max()) - x_min + 1, int(self.y.max()) - y_min + 1),
+                        dtype=self.counts.dtype)
+        grid[self.x - x_min, self.y - y_min] = self.counts
+
+        return grid, (x_min, y_min)
+
+    def top(self, n=10):
+        """
+        Returns the houses which recieve the most presents.
+
+        Parameters
+        ----------
+        n : int, optional
+            The number of houses to return.
+            The default is 10.
+
+        Returns
+        -------
+        list of tuple
+            The coordinates (x, y) and number of presents of the n busiest houses, busiest first.
+
+        """
+        order = np.argsort(-self.counts, kind='stable')[:n]
+        return [((int(self.x[i]), int(self.y[i])), int(self.counts[i])) for i in order]
+
+    def coverage(self):
+        """
+        Returns summary statistics of the deliveries.
+
+        Returns
+        -------
+        dict
+            The number of 'houses' visited, the total number of 'deliveries', the 'mean' and
+            'max' presents per visited house, the number of houses visited only 'once', the
+            'bounding_area' of the visited houses and the 'fraction' of that area visited.
+
+        """
+        bounding_area = (int(self.x.max() - self.x.min()) + 1)*(int(self.y.max() - self.y.min()) + 1)
+        return {'houses' : len(self.counts),
+                'deliveries' : int(self.counts.sum()),
+                'mean' : float(self.counts.mean()),
+                'max' : int(self.counts.max()),
+                'once' : int(np.count_nonzero(self.counts == 1)),
+                'bounding_area' : bounding_area,
+                'fraction' : len(self.counts)/bounding_area}
+
+def read_directions(filename='Inputs/Day3_Inputs.txt'):
+    """
+    Reads the string of directions from an input file.
+
+    Parameters
+    ----------
+    filename : str, optional
+        Input file giving the directions.
+        The default is 'Inputs/Day3_Inputs.txt'.
+
+    Returns
+    -------
+    str
+        The directions, one character per move.
 
     """
     file = open(filename)
@@ -110,27 +381,136 @@ def Day3_Part1(filename='Inputs/Day3_Inputs.txt'):
         if len(line) > 0:
             directions.append(line)
     file.close()
-    
-    pos = [0, 0]
-    map_ = {}
-    map_[Coordinates(pos)] = 1
-    for direction in directions[0][0]:
-        if direction == '^':
-            pos[1] += 1
-        elif direction == '>':
-            pos[0] += 1
-        elif direction == 'v':
-            pos[1] -= 1
-        elif direction == '<':
-            pos[0] -= 1
-        else:
+
+    return directions[0][0]
+
+def visited_houses(directions, deliverers=1):
+    """
+    Returns the set of houses which get at least one present delivered, when a number of
+    deliverers start at (0, 0) and take turns moving according to a string of directions,
+    delivering a present at every stop. Houses are stored as packed integer keys, so each move
+    is a single integer addition.
+
+    Parameters
+    ----------
+    directions : str
+        The directions, one character per move.
+    deliverers : int, optional
+        The number of deliverers taking turns.
+        The default is 1.
+
+    Raises
+    ------
+    Exception
+        Unknown direction encountered.
+
+    Returns
+    -------
+    visited : set of int
+        The packed keys of every house visited.
+
+    """
+    positions = [ORIGIN_KEY]*deliverers
+    visited = {ORIGIN_KEY}
+    for n, direction in enumerate(directions):
+        try:
+            step = KEY_STEPS[direction]
+        except KeyError:
             raise Exception('Unknown direction!')
+        positions[n % deliverers] += step
+        visited.add(positions[n % deliverers])
+
+    return visited
+
+def count_houses(directions, deliverers=1, method='packed'):
+    """
+    Returns the number of houses which get at least one present delivered, when a number of
+    deliverers start at (0, 0) and take turns moving according to a string of directions,
+    delivering a present at every stop.
+
+    Parameters
+    ----------
+    directions : str
+        The directions, one character per move.
+    deliverers : int, optional
+        The number of deliverers taking turns.
+        The default is 1.
+    method : str, optional
+        How visited houses are recorded. Options are 'packed' (a set of packed integer keys),
+        'bitmap' (a dense bitmap sized from the bounding box of the path) and 'numpy' (unique
+        packed keys of the vectorised walk from walk_positions).
+        The default is 'packed'.
+
+    Raises
+    ------
+    Exception
+        Unknown direction or method encountered.
+
+    Returns
+    -------
+    num_houses : int
+        The number of houses which recieve at least one present.
+
+    """
+    if method == 'packed':
+        return len(visited_houses(directions, deliverers))
+    elif method == 'numpy':
+        keys = [pack_coordinate_arrays(x, y) for x, y in walk_positions(directions, deliverers)]
+        return len(np.unique(np.concatenate(keys)))
+    elif method != 'bitmap':
+        raise Exception(f'Unknown method: {method}')
+
+    # first pass finds the bounding box of every deliverer's path
+    positions = [[0, 0] for _ in range(deliverers)]
+    x_min, x_max, y_min, y_max = 0, 0, 0, 0
+    for n, direction in enumerate(directions):
         try:
-            map_[Coordinates(pos)] += 1
-        except:
-            map_[Coordinates(pos)] = 1
-    
-    num_houses = len(map_)
+            dx, dy = MOVES[direction]
+        except KeyError:
+            raise Exception('Unknown direction!')
+        pos = positions[n % deliverers]
+        pos[0] += dx
+        pos[1] += dy
+        x_min, x_max = min(x_min, pos[0]), max(x_max, pos[0])
+        y_min, y_max = min(y_min, pos[1]), max(y_max, pos[1])
+
+    # second pass marks every visited house in the bitmap
+    height = y_max - y_min + 1
+    bitmap = bytearray((x_max - x_min + 1)*height)
+    positions = [-x_min*height - y_min]*deliverers
+    bitmap[positions[0]] = 1
+    steps = {direction : dx*height + dy for direction, (dx, dy) in MOVES.items()}
+    for n, direction in enumerate(directions):
+        positions[n % deliverers] += steps[direction]
+        bitmap[positions[n % deliverers]] = 1
+
+    num_houses = bitmap.count(1)
+    return num_houses
+
+def Day3_Part1(filename='Inputs/Day3_Inputs.txt'):
+    """
+    Returns the number of houses in an infinite 2D map of houses which get at least one
+    present delivered, when Santa starts at (0, 0) and moves according to a series of
+    instructions, given in an input file, delivering a present at every stop.
+
+    Parameters
+    ----------
+    filename : str, optional
+        Input file giving the directions.
+        The default is 'Inputs/Day3_Inputs.txt'.
+
+    Raises
+    ------
+    Exception
+        Unknown direction encountered.
+
+    Returns
+    -------
+    num_houses : int
+        The number of houses which recieve at least one present.
+
+    """
+    num_houses = count_houses(read_directions(filename))
     return num_houses
 
 def Day3_Part2(filename='Inputs/Day3_Inputs.txt'):
@@ -157,52 +537,5 @@ def Day3_Part2(filename='Inputs/Day3_Inputs.txt'):
         The number of houses which recieve at least one present.
 
     """
-    file = open(filename)
-    directions = []
-    for line in file:
-        line = line.strip()
-        line = shlex.split(line)
-        if len(line) > 0:
-            directions.append(line)
-    file.close()
- 
-    santa_pos = [0, 0]
-    robot_pos = [0, 0]
-    map_ = {}
-    map_[Coordinates([0, 0])] = 2
-    for n, direction in enumerate(directions[0][0]):
-        if direction == '^':
-            if n%2 == 0:
-                santa_pos[1] += 1
-            else:
-                robot_pos[1] += 1
-        elif direction == '>':
-            if n%2 == 0:
-                santa_pos[0] += 1
-            else:
-                robot_pos[0] += 1
-        elif direction == 'v':
-            if n%2 == 0:
-                santa_pos[1] -= 1
-            else:
-                robot_pos[1] -= 1
-        elif direction == '<':
-            if n%2 == 0:
-                santa_pos[0] -= 1
-            else:
-                robot_pos[0] -= 1
-        else:
-            raise Exception('Unknown direction!')
-        try:
-            if n%2 == 0:
-                map_[Coordinates(santa_pos)] = 1
-            else:
-                map_[Coordinates(robot_pos)] = 1
-        except:
-            if n%2 == 0:
-                map_[Coordinates(santa_pos)] += 1
-            else:
-                map_[Coordinates(robot_pos)] += 1
-    
-    num_houses = len(map_)
-    return num_houses
\ No newline at end of file
+    num_houses = count_houses(read_directions(filename), deliverers=2)
+    return num_houses
@@ -1,6 +1,13 @@
+import json
+import os
+import random
 import shlex
+import time
 import numpy as np
 from hashlib import md5
+from itertools import count
+from multiprocessing import Pool
+from parallel import bounded_imap
 
 class unsigned32:
     """
@@ -412,7 +419,7 @@ def MD5(string):
     
     # pad string
     binary_string += '1'
-    binary_string += '0' * (512 - 64 - (len(binary_string)%512))
+    binary_string += '0' * ((512 - 64 - (len(binary_string)%512)) % 512)
     binary_string = flip_bits_in_byte(binary_string)
     
     # append 64-bit binary string length to string
@@ -495,7 +502,455 @@ def MD5(string):
     
     return MD5_hash_hex
 
-def Day4_Part1(filename='Inputs/Day4_Inputs.txt'):
+# MD5 constants for the integer and vectorised implementations
+MD5_INIT = (0x67452301, 0xefcdab89, 0x98badcfe, 0x10325476)
+MD5_K = [int(abs(np.sin(i + 1))*(2**32)) for i in range(64)]
+MD5_S = [shift_list[i%4] for shift_list in [[7, 12, 17, 22], [5, 9, 14, 20], [4, 11, 16, 23],
+                                            [6, 10, 15, 21]] for i in range(16)]
+MD5_INDEX = ([i for i in range(16)] + [(5*i + 1) % 16 for i in range(16)]
+             + [(3*i + 5) % 16 for i in range(16)] + [(7*i) % 16 for i in range(16)])
+
+def md5_pad(message):
+    """
+    Pads a message according to the MD5 specification, appending a 1 bit, zeros up to 448 bits
+    modulo 512 and the 64-bit little-endian message length in bits.
+
+    Parameters
+    ----------
+    message : bytes
+        Input message.
+
+    Returns
+    -------
+    bytes
+        The padded message, a whole number of 64-byte blocks long.
+
+    """
+    return (message + b'\x80' + b'\x00'*((55 - len(message)) % 64)
+            + ((8*len(message)) % 2**64).to_bytes(8, 'little'))
+
+def md5_compress_int(state, block):
+    """
+    Applies the MD5 compression function to a single 64-byte block using native Python integers.
+
+    Parameters
+    ----------
+    state : tuple of int
+        The current values of the buffers A, B, C and D.
+    block : bytes
+        The 64-byte block to process.
+
+    Returns
+    -------
+    tuple of int
+        The values of the buffers A, B, C and D after processing the block.
+
+    """
+    M = [int.from_bytes(block[4*i:4*(i+1)], 'little') for i in range(16)]
+    a, b, c, d = state
+    for i in range(64):
+        if i < 16:
+            f = (b & c) | (~b & d)
+        elif i < 32:
+            f = (b & d) | (c & ~d)
+        elif i < 48:
+            f = b ^ c ^ d
+        else:
+            f = c ^ (b | (~d & 0xFFFFFFFF))
+        f = (f + a + MD5_K[i] + M[MD5_INDEX[i]]) & 0xFFFFFFFF
+        a, d, c = d, c, b
+        b = (b + ((f << MD5_S[i]) | (f >> (32 - MD5_S[i])))) & 0xFFFFFFFF
+
+    return tuple((x + y) & 0xFFFFFFFF for x, y in zip(state, (a, b, c, d)))
+
+def md5_int(message):
+    """
+    Applies the MD5 hashing algorithm to an input message using native Python integers and
+    returns the result in hexadecimal format.
+
+    Parameters
+    ----------
+    message : str or bytes
+        Input message to be hashed. Strings are encoded as UTF-8.
+
+    Returns
+    -------
+    str
+        MD5 hash of the input message in hexadecimal format.
+
+    """
+    if isinstance(message, str):
+        message = message.encode('utf-8')
+    padded = md5_pad(message)
+    state = MD5_INIT
+    for start in range(0, len(padded), 64):
+        state = md5_compress_int(state, padded[start:start+64])
+
+    return b''.join(x.to_bytes(4, 'little') for x in state).hex()
+
+def md5_compress_batch(state, blocks):
+    """
+    Applies the MD5 compression function to a batch of messages at once, with each message's
+    buffers held in one lane of a set of unsigned 32-bit NumPy arrays.
+
+    Parameters
+    ----------
+    state : numpy.ndarray of uint32
+        The current values of the buffers A, B, C and D for each message, with shape (N, 4).
+    blocks : numpy.ndarray of uint32
+        The little-endian words of the blocks to process for each message, with shape
+        (N, number of blocks, 16).
+
+    Returns
+    -------
+    state : numpy.ndarray of uint32
+        The values of the buffers A, B, C and D for each message after processing the blocks.
+
+    """
+    state = state.copy()
+    for block in range(blocks.shape[1]):
+        M = blocks[:, block, :]
+        a, b, c, d = (state[:, i].copy() for i in range(4))
+        for i in range(64):
+            if i < 16:
+                f = (b & c) | (~b & d)
+            elif i < 32:
+                f = (b & d) | (c & ~d)
+            elif i < 48:
+                f = b ^ c ^ d
+            else:
+                f = c ^ (b | ~d)
+            f += a
+            f += np.uint32(MD5_K[i])
+            f += M[:, MD5_INDEX[i]]
+            a, d, c = d, c, b
+            b = b + ((f << np.uint32(MD5_S[i])) | (f >> np.uint32(32 - MD5_S[i])))
+        state += np.stack([a, b, c, d], axis=1)
+
+    return state
+
+def md5_batch_words(messages):
+    """
+    Applies the MD5 hashing algorithm to a batch of messages, vectorised across the batch, and
+    returns the final buffers of each hash. Messages are grouped by padded length so that every
+    group is processed together.
+
+    Parameters
+    ----------
+    messages : list of str or bytes
+        Input messages to be hashed. Strings are encoded as UTF-8.
+
+    Returns
+    -------
+    state : numpy.ndarray of uint32
+        The final values of the buffers A, B, C and D for each message, with shape (N, 4).
+
+    """
+    padded = [md5_pad(m.encode('utf-8') if isinstance(m, str) else m) for m in messages]
+    state = np.empty((len(padded), 4), dtype=np.uint32)
+    groups = {}
+    for n, message in enumerate(padded):
+        groups.setdefault(len(message), []).append(n)
+    for length, indices in groups.items():
+        blocks = np.frombuffer(b''.join(padded[n] for n in indices), dtype='<u4')
+        blocks = blocks.reshape(len(indices), length//64, 16).astype(np.uint32)
+        init = np.tile(np.array(MD5_INIT, dtype=np.uint32), (len(indices), 1))
+        state[indices] = md5_compress_batch(init, blocks)
+
+    return state
+
+def md5_batch(messages):
+    """
+    Applies the MD5 hashing algorithm to a batch of messages, vectorised across the batch, and
+    returns the results in hexadecimal format.
+
+    Parameters
+    ----------
+    messages : list of str or bytes
+        Input messages to be hashed. Strings are encoded as UTF-8.
+
+    Returns
+    -------
+    list of str
+        MD5 hash of each input message in hexadecimal format.
+
+    """
+    digests = md5_batch_words(messages).astype('<u4').tobytes()
+    return [digests[16*n:16*(n+1)].hex() for n in range(len(messages))]
+
+class MD5Prefix:
+    """
+    Class holding the MD5 state after a constant message prefix (the midstate), so that many
+    messages sharing the prefix only need their varying suffixes to be hashed.
+    """
+    def __init__(self, prefix):
+        """
+        Initialise the class with one parameter, compressing every whole 64-byte block of the
+        prefix once.
+
+        Parameters
+        ----------
+        prefix : str or bytes
+            The constant message prefix. Strings are encoded as UTF-8.
+
+        Returns
+        -------
+        None.
+
+        """
+        if isinstance(prefix, str):
+            prefix = prefix.encode('utf-8')
+        self.length = len(prefix)
+        self.state = MD5_INIT
+        whole = 64*(len(prefix)//64)
+        for start in range(0, whole, 64):
+            self.state = md5_compress_int(self.state, prefix[start:start+64])
+        # bytes of the prefix not yet compressed
+        self.tail = prefix[whole:]
+
+    def __repr__(self):
+        """
+        Return the representation of an MD5Prefix object.
+
+        Returns
+        -------
+        str
+            Representation.
+
+        """
+        return f'{self.__class__.__name__}({self.length} bytes, tail={self.tail!r})'
+
+    def pad(self, suffix_length):
+        """
+        Returns the MD5 padding for a message made of the prefix and a suffix of a given length.
+
+        Parameters
+        ----------
+        suffix_length : int
+            The number of bytes in the suffix.
+
+        Returns
+        -------
+        bytes
+            The padding appended after the suffix.
+
+        """
+        length = self.length + suffix_length
+        return (b'\x80' + b'\x00'*((55 - length) % 64)
+                + ((8*length) % 2**64).to_bytes(8, 'little'))
+
+    def hexdigest(self, suffix):
+        """
+        Applies the MD5 hashing algorithm to the prefix followed by a suffix, using native Python
+        integers, and returns the result in hexadecimal format.
+
+        Parameters
+        ----------
+        suffix : str or bytes
+            The message suffix. Strings are encoded as UTF-8.
+
+        Returns
+        -------
+        str
+            MD5 hash of the prefix and suffix in hexadecimal format.
+
+        """
+        if isinstance(suffix, str):
+            suffix = suffix.encode('utf-8')
+        remaining = self.tail + suffix + self.pad(len(suffix))
+        state = self.state
+        for start in range(0, len(remaining), 64):
+            state = md5_compress_int(state, remaining[start:start+64])
+
+        return b''.join(x.to_bytes(4, 'little') for x in state).hex()
+
+    def nonce_words(self, start, stop):
+        """
+        Applies the MD5 hashing algorithm to the prefix followed by each integer in a range,
+        vectorised across the range. Every integer in the range must have the same number of
+        digits, so the padding and length fields are built once for the whole range and the
+        digits are generated directly as an array.
+
+        Parameters
+        ----------
+        start : int
+            The first integer in the range.
+        stop : int
+            One past the last integer in the range.
+
+        Raises
+        ------
+        Exception
+            The integers in the range have different numbers of digits.
+
+        Returns
+        -------
+        state : numpy.ndarray of uint32
+            The final values of the buffers A, B, C and D for each integer, with shape (N, 4).
+
+        """
+        digits = len(str(start))
+        if len(str(stop - 1)) != digits:
+            raise Exception(f'Integers from {start} to {stop - 1} have different numbers of digits')
+
+        nonces = np.arange(start, stop, dtype=np.int64)
+        suffixes = np.empty((len(nonces), digits), dtype=np.uint8)
+        for j in range(digits):
+            suffixes[:, j] = (nonces // 10**(digits - 1 - j)) % 10 + ord('0')
+
+        tail = np.frombuffer(self.tail, dtype=np.uint8)
+        pad = np.frombuffer(self.pad(digits), dtype=np.uint8)
+        messages = np.empty((len(nonces), len(tail) + digits + len(pad)), dtype=np.uint8)
+        messages[:, :len(tail)] = tail
+        messages[:, len(tail):len(tail) + digits] = suffixes
+        messages[:, len(tail) + digits:] = pad
+
+        blocks = messages.view('<u4').astype(np.uint32).reshape(len(nonces), -1, 16)
+        state = np.tile(np.array(self.state, dtype=np.uint32), (len(nonces), 1))
+
+        return md5_compress_batch(state, blocks)
+
+def nonce_groups(start, stop):
+    """
+    Splits a range of integers into consecutive ranges whose integers all have the same number
+    of digits.
+
+    Parameters
+    ----------
+    start : int
+        The first integer in the range.
+    stop : int
+        One past the last integer in the range.
+
+    Yields
+    ------
+    tuple of int
+        The start and stop of the next range.
+
+    """
+    while start < stop:
+        group_stop = min(stop, 10**len(str(start)))
+        yield start, group_stop
+        start = group_stop
+
+def leading_zeros_mask(state, zeros):
+    """
+    Finds which of a batch of MD5 hashes start with at least a given number of zeros in
+    hexadecimal format, directly from their final buffers.
+
+    Parameters
+    ----------
+    state : numpy.ndarray of uint32
+        The final values of the buffers A, B, C and D for each message, with shape (N, 4).
+    zeros : int
+        The number of leading hexadecimal zeros required.
+
+    Returns
+    -------
+    mask : numpy.ndarray of bool
+        Whether each hash starts with at least the given number of zeros.
+
+    """
+    # the digest is the little-endian bytes of each buffer, so byteswap to read it in order
+    words = state.astype('<u4').byteswap()
+    mask = np.ones(len(state), dtype=bool)
+    for i in range(4):
+        nibbles = min(max(zeros - 8*i, 0), 8)
+        if nibbles == 8:
+            mask &= words[:, i] == 0
+        elif nibbles > 0:
+            mask &= (words[:, i] >> np.uint32(32 - 4*nibbles)) == 0
+
+    return mask
+
+def midstate_hexdigest(key):
+    """
+    Returns a function which applies the in-built Python MD5 algorithm to a string key followed
+    by a suffix, hashing the key only once and copying its state for every suffix.
+
+    Parameters
+    ----------
+    key : str
+        The constant message prefix.
+
+    Returns
+    -------
+    function
+        Function taking a suffix (str) and returning the MD5 hash of the key and suffix in
+        hexadecimal format.
+
+    """
+    base = md5(key.encode('utf-8'))
+    def hexdigest(suffix):
+        cipher = base.copy()
+        cipher.update(suffix.encode('utf-8'))
+        return cipher.hexdigest()
+
+    return hexdigest
+
+def mine(key, zeros=5, backend='numpy', batch_size=4096):
+    """
+    Calculates the lowest positive integer which, when appended to a string key and input into
+    an MD5 hashing algorithm, returns a hash which starts with a given number of zeros in
+    hexadecimal format.
+
+    Parameters
+    ----------
+    key : str
+        The secret key.
+    zeros : int, optional
+        The number of leading hexadecimal zeros required.
+        The default is 5.
+    backend : str, optional
+        The MD5 implementation to use. Options are 'numpy' (MD5Prefix.nonce_words, testing
+        batch_size integers at once from the key's midstate, grouped by number of digits with
+        nonce_groups), 'int' (MD5Prefix.hexdigest, from the key's midstate), 'string' (MD5,
+        hashing the whole message each time) and 'hashlib' (midstate_hexdigest, copying the
+        hashlib state after the key).
+        The default is 'numpy'.
+    batch_size : int, optional
+        The number of integers tested at once by the 'numpy' backend.
+        The default is 4096.
+
+    Raises
+    ------
+    Exception
+        Unknown backend.
+
+    Returns
+    -------
+    i : int
+        The lowest integer which returns an MD5 hash starting with at least the given number of
+        zeros in hexadecimal format, when appended to the given key.
+
+    """
+    if backend == 'numpy':
+        prefix = MD5Prefix(key)
+        start = 0
+        while True:
+            for group_start, group_stop in nonce_groups(start, start + batch_size):
+                state = prefix.nonce_words(group_start, group_stop)
+                hits = np.flatnonzero(leading_zeros_mask(state, zeros))
+                if len(hits) > 0:
+                    return group_start + int(hits[0])
+            start += batch_size
+
+    if backend == 'int':
+        hash_function = MD5Prefix(key).hexdigest
+    elif backend == 'string':
+        hash_function = lambda suffix : MD5(key + suffix)
+    elif backend == 'hashlib':
+        hash_function = midstate_hexdigest(key)
+    else:
+        raise Exception(f'Unknown backend: {backend}')
+
+    i = 0
+    while not hash_function(str(i)).startswith('0'*zeros):
+        i += 1
+
+    return i
+
+def Day4_Part1(filename='Inputs/Day4_Inputs.txt', backend='numpy'):
     """
     Calculates the lowest positive integer which, when appended to a string key given in an
     input file and input into an MD5 hashing algorithm, returns a hash which starts with
@@ -506,6 +961,9 @@ def Day4_Part1(filename='Inputs/Day4_Inputs.txt'):
     filename : str, optional
         The input file containing the key.
         The default is 'Inputs/Day4_Inputs.txt'.
+    backend : str, optional
+        The MD5 implementation to use, see mine for the options.
+        The default is 'numpy'.
 
     Returns
     -------
@@ -523,11 +981,8 @@ def Day4_Part1(filename='Inputs/Day4_Inputs.txt'):
             key = line[0]
     file.close()
     
-    i = 0
-    cipher = MD5()
-    while not cipher.hash(key + str(i)).startswith('00000'):
-        i += 1
-        
+    i = mine(key, 5, backend)
+
     return i
 
 def Day4_Part1a(filename='Inputs/Day4_Inputs.txt'):
@@ -561,16 +1016,13 @@ def Day4_Part1a(filename='Inputs/Day4_Inputs.txt'):
     file.close()
     
     i = 0
-    tester = str(key) + str(i)
-    cipher = md5(tester.encode('utf-8'))
-    while not cipher.hexdigest().startswith('00000'):
+    hexdigest = midstate_hexdigest(str(key))
+    while not hexdigest(str(i)).startswith('00000'):
         i += 1
-        tester = str(key) + str(i)
-        cipher = md5(tester.encode('utf-8'))
     
     return i
 
-def Day4_Part2(filename='Inputs/Day4_Inputs.txt'):
+def Day4_Part2(filename='Inputs/Day4_Inputs.txt', backend='numpy'):
     """
     Calculates the lowest positive integer which, when appended to a string key given in an
     input file and input into an MD5 hashing algorithm, returns a hash which starts with
@@ -581,6 +1033,9 @@ def Day4_Part2(filename='Inputs/Day4_Inputs.txt'):
     filename : str, optional
         The input file containing the key.
         The default is 'Inputs/Day4_Inputs.txt'.
+    backend : str, optional
+        The MD5 implementation to use, see mine for the options.
+        The default is 'numpy'.
 
     Returns
     -------
@@ -598,11 +1053,8 @@ def Day4_Part2(filename='Inputs/Day4_Inputs.txt'):
             key = line[0]
     file.close()
     
-    i = 0
-    cipher = MD5()
-    while not cipher.hash(key + str(i)).startswith('000000'):
-        i += 1
-        
+    i = mine(key, 6, backend)
+
     return i
 
 def Day4_Part2a(filename='Inputs/Day4_Inputs.txt'):
@@ -636,11 +1088,262 @@ def Day4_Part2a(filename='Inputs/Day4_Inputs.txt'):
     file.close()
     
     i = 0
-    tester = str(key) + str(i)
-    cipher = md5(tester.encode('utf-8'))
-    while not cipher.hexdigest().startswith('000000'):
+    hexdigest = midstate_hexdigest(str(key))
+    while not hexdigest(str(i)).startswith('000000'):
         i += 1
-        tester = str(key) + str(i)
-        cipher = md5(tester.encode('utf-8'))
     
     return i
+
+def mine_block(args):
+    """
+    Finds the lowest integer in a block of integers which, when appended to a string key and
+    input into an MD5 hashing algorithm, returns a hash which starts with a given number of
+    zeros in hexadecimal format.
+
+    Parameters
+    ----------
+    args : tuple
+        The key (str), the first (int) and one past the last (int) integer in the block, and the
+        number of leading hexadecimal zeros required (int).
+
+    Returns
+    -------
+    int or None
+        The lowest integer in the block which gives a valid hash, or None if there is none.
+
+    """
+    key, start, stop, zeros = args
+    prefix = '0'*zeros
+    hexdigest = midstate_hexdigest(key)
+    for i in range(start, stop):
+        if hexdigest(str(i)).startswith(prefix):
+            return i
+
+    return None
+
+def mine_parallel(key, zeros=5, processes=None, block_size=2**16):
+    """
+    Calculates the lowest positive integer which, when appended to a string key and input into
+    an MD5 hashing algorithm, returns a hash which starts with a given number of zeros in
+    hexadecimal format, searching consecutive blocks of integers across a pool of processes.
+
+    Blocks are collected in order, so the first block found to contain a valid integer has every
+    lower block already searched, and its lowest valid integer is the overall answer. The pool
+    is then terminated, cancelling the search of any higher blocks.
+
+    Parameters
+    ----------
+    key : str
+        The secret key.
+    zeros : int, optional
+        The number of leading hexadecimal zeros required.
+        The default is 5.
+    processes : int or None, optional
+        Number of worker processes to use, or None to use every available core.
+        The default is None.
+    block_size : int, optional
+        The number of integers searched by a worker at a time.
+        The default is 2**16.
+
+    Returns
+    -------
+    i : int
+        The lowest integer which returns an MD5 hash starting with at least the given number of
+        zeros in hexadecimal format, when appended to the given key.
+
+    """
+    processes = processes or os.cpu_count()
+    tasks = ((key, start, start + block_size, zeros) for start in count(0, block_size))
+    with Pool(processes) as pool:
+        for i in bounded_imap(pool, mine_block, tasks, 2*processes):
+            if i is not None:
+                return i
+
+def Day4_Parallel(filename='Inputs/Day4_Inputs.txt', zeros=5, processes=None, block_size=2**16):
+    """
+    Calculates the lowest positive integer which, when appended to a string key given in an
+    input file and input into an MD5 hashing algorithm, returns a hash which starts with a
+    given number of zeros in hexadecimal format, searching across a pool of processes.
+
+    Parameters
+    ----------
+    filename : str, optional
+        The input file containing the key.
+        The default is 'Inputs/Day4_Inputs.txt'.
+    zeros : int, optional
+        The number of leading hexadecimal zeros required.
+        The default is 5.
+    processes : int or None, optional
+        Number of worker processes to use, or None to use every available core.
+        The default is None.
+    block_size : int, optional
+        The number of integers searched by a worker at a time.
+        The default is 2**16.
+
+    Returns
+    -------
+    i : int
+        The lowest integer which returns an MD5 hash starting with at least the given number of
+        zeros in hexadecimal format, when appended to the given key.
+
+    """
+    file = open(filename)
+    key = []
+    for line in file:
+        line = line.strip()
+        line = shlex.split(line)
+        if len(line) > 0:
+            key = line[0]
+    file.close()
+
+    i = mine_parallel(key, zeros, processes, block_size)
+
+    return i
+
+# every MD5 implementation, each taking a list of strings and returning their hexadecimal hashes
+MD5_BACKENDS = {'string' : lambda messages : [MD5(message) for message in messages],
+                'int' : lambda messages : [md5_int(message) for message in messages],
+                'numpy' : md5_batch,
+                'hashlib' : lambda messages : [md5(message.encode('utf-8')).hexdigest()
+                                               for message in messages]}
+
+def random_messages(number, length, rng):
+    """
+    Generates random printable ASCII messages.
+
+    Parameters
+    ----------
+    number : int
+        The number of messages.
+    length : int
+        The length of every message.
+    rng : random.Random
+        The random number generator to use.
+
+    Returns
+    -------
+    list of str
+        The random messages.
+
+    """
+    return [''.join(chr(rng.randint(32, 126)) for _ in range(length)) for _ in range(number)]
+
+def fuzz_md5(trials=200, max_length=200, backends=None, seed=0):
+    """
+    Compares the hashes of random messages from each MD5 implementation against hashlib.
+
+    Parameters
+    ----------
+    trials : int, optional
+        The number of random messages to compare.
+        The default is 200.
+    max_length : int, optional
+        The maximum length of the random messages.
+        The default is 200.
+    backends : list of str or None, optional
+        The backends to check, or None to check every backend in MD5_BACKENDS.
+        The default is None.
+    seed : int, optional
+        Seed for the random messages.
+        The default is 0.
+
+    Returns
+    -------
+    mismatches : list of dict
+        The 'backend', 'message', 'expected' and 'got' hashes of every mismatch.
+
+    """
+    rng = random.Random(seed)
+    messages = [random_messages(1, rng.randint(0, max_length), rng)[0] for _ in range(trials)]
+    expected = MD5_BACKENDS['hashlib'](messages)
+
+    mismatches = []
+    for backend in backends or MD5_BACKENDS:
+        for message, hash_expected, hash_got in zip(messages, expected, MD5_BACKENDS[backend](messages)):
+            if hash_got != hash_expected:
+                mismatches.append({'backend' : backend, 'message' : message,
+                                   'expected' : hash_expected, 'got' : hash_got})
+
+    return mismatches
+
+def benchmark_md5(lengths=(8, 55, 56, 64, 200), batch_sizes=(1, 64, 1024), backends=None,
+                  min_time=0.1, seed=0):
+    """
+    Measures the throughput of each MD5 implementation across message lengths and batch sizes.
+
+    Parameters
+    ----------
+    lengths : iterable of int, optional
+        The message lengths to measure.
+        The default is (8, 55, 56, 64, 200).
+    batch_sizes : iterable of int, optional
+        The number of messages hashed per call.
+        The default is (1, 64, 1024).
+    backends : list of str or None, optional
+        The backends to measure, or None to measure every backend in MD5_BACKENDS.
+        The default is None.
+    min_time : float, optional
+        The minimum time in seconds spent measuring each combination.
+        The default is 0.1.
+    seed : int, optional
+        Seed for the random messages.
+        The default is 0.
+
+    Returns
+    -------
+    results : list of dict
+        The 'backend', message 'length', 'batch_size', number of 'hashes', elapsed 'seconds' and
+        'hashes_per_sec' of each combination.
+
+    """
+    rng = random.Random(seed)
+    results = []
+    for backend in backends or MD5_BACKENDS:
+        for length in lengths:
+            for batch_size in batch_sizes:
+                messages = random_messages(batch_size, length, rng)
+                hashes = 0
+                start = time.perf_counter()
+                while hashes == 0 or time.perf_counter() - start < min_time:
+                    MD5_BACKENDS[backend](messages)
+                    hashes += batch_size
+                seconds = time.perf_counter() - start
+                results.append({'backend' : backend, 'length' : length, 'batch_size' : batch_size,
+                                'hashes' : hashes, 'seconds' : seconds,
+                                'hashes_per_sec' : hashes/seconds})
+
+    return results
+
+def Day4_Benchmark(output=None, backends=None, fuzz_trials=200, **kwargs):
+    """
+    Cross-checks every MD5 implementation against hashlib and measures their throughput,
+    optionally writing the results to a JSON file so regressions can be tracked.
+
+    Parameters
+    ----------
+    output : str or None, optional
+        File to write the results to as JSON, or None to not write them.
+        The default is None.
+    backends : list of str or None, optional
+        The backends to check, or None to check every backend in MD5_BACKENDS.
+        The default is None.
+    fuzz_trials : int, optional
+        The number of random messages to compare against hashlib.
+        The default is 200.
+    **kwargs
+        Further arguments passed to benchmark_md5.
+
+    Returns
+    -------
+    results : dict
+        The 'mismatches' found by fuzz_md5 and the 'benchmarks' measured by benchmark_md5.
+
+    """
+    results = {'mismatches' : fuzz_md5(fuzz_trials, backends=backends),
+               'benchmarks' : benchmark_md5(backends=backends, **kwargs)}
+
+    if output is not None:
+        with open(output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    return results
@@ -1,4 +1,102 @@
+import re
 import shlex
+import numpy as np
+from functools import lru_cache
+from itertools import islice
+from multiprocessing import Pool
+from parallel import bounded_imap
+
+VOWELS = frozenset('aeiou')
+FORBIDDEN_PAIRS = frozenset(['ab', 'cd', 'pq', 'xy'])
+
+def is_nice_part1(string):
+    """
+    Checks whether a string is nice according to the rules of Part 1, evaluating every rule in a
+    single left-to-right pass over the string and stopping as soon as a forbidden pair is found.
+
+    Parameters
+    ----------
+    string : str
+        The string to be judged.
+
+    Returns
+    -------
+    bool
+        Whether the string is nice.
+
+    """
+    vowels = 0
+    double = False
+    prev = ''
+    for char in string:
+        if prev + char in FORBIDDEN_PAIRS:
+            return False
+        if char in VOWELS:
+            vowels += 1
+        if char == prev:
+            double = True
+        prev = char
+
+    return vowels >= 3 and double
+
+def is_nice_part2(string):
+    """
+    Checks whether a string is nice according to the rules of Part 2, evaluating every rule in a
+    single left-to-right pass over the string. The position each pair is first seen at is
+    recorded, so a later non-overlapping repeat of the pair is found without rescanning.
+
+    Parameters
+    ----------
+    string : str
+        The string to be judged.
+
+    Returns
+    -------
+    bool
+        Whether the string is nice.
+
+    """
+    first_seen = {}
+    repeated_pair = False
+    gapped_repeat = False
+    for i in range(len(string) - 1):
+        if not repeated_pair and i - first_seen.setdefault(string[i:i+2], i) >= 2:
+            repeated_pair = True
+        if not gapped_repeat and i > 0 and string[i-1] == string[i+1]:
+            gapped_repeat = True
+        if repeated_pair and gapped_repeat:
+            return True
+
+    return False
+
+def Day5_Classify(strings, part=1):
+    """
+    Classifies a batch of strings as nice or naughty according to the rules of either part.
+
+    Parameters
+    ----------
+    strings : iterable of str
+        The strings to be judged.
+    part : int, optional
+        The part whose rules are used, 1 or 2.
+        The default is 1.
+
+    Raises
+    ------
+    Exception
+        Unknown part.
+
+    Returns
+    -------
+    numpy.ndarray of bool
+        Mask giving whether each string is nice.
+
+    """
+    if part not in (1, 2):
+        raise Exception(f'Unknown part: {part}')
+    is_nice = is_nice_part1 if part == 1 else is_nice_part2
+
+    return np.fromiter(map(is_nice, strings), dtype=bool)
 
 def Day5_Part1(filename='Inputs/Day5_Inputs.txt', printout=False):
     """
@@ -33,6 +131,9 @@ def Day5_Part1(filename='Inputs/Day5_Inputs.txt', printout=False):
             strings.append(line[0])
     file.close()
     
+    if not printout:
+        return int(np.count_nonzero(Day5_Classify(strings, 1)))
+
     nice = 0
     illegal_chars = ['ab', 'cd', 'pq', 'xy']
     vowels = ['a', 'e', 'i', 'o', 'u']
@@ -93,6 +194,9 @@ def Day5_Part2(filename='Inputs/Day5_Inputs.txt', printout=False):
             strings.append(line[0])
     file.close()
     
+    if not printout:
+        return int(np.count_nonzero(Day5_Classify(strings, 2)))
+
     nice = 0
     alphabet = 'abcdefghijklmnopqrstuvwxyz'
     for string in strings:
@@ -109,4 +213,191 @@ def Day5_Part2(filename='Inputs/Day5_Inputs.txt', printout=False):
             if printout:
                 print(f'{string} is nice!')
     
-    return nice
\ No newline at end of file
+    return nice
+
+# declarative rule sets, each rule being a tuple of its name followed by its parameters:
+#     ('vowels', n[, vowels]) - contains at least n vowels (default 'aeiou')
+#     ('double',) - contains a letter which appears twice in a row
+#     ('forbidden', substrings) - contains none of the substrings
+#     ('repeated_pair',) - contains a pair of letters which appears twice without overlapping
+#     ('gapped_repeat', gap) - contains a letter which repeats with exactly gap letters between
+# a string is rejected by the first rule in the set which it fails
+PART1_RULES = (('forbidden', ('ab', 'cd', 'pq', 'xy')), ('vowels', 3), ('double',))
+PART2_RULES = (('repeated_pair',), ('gapped_repeat', 1))
+
+@lru_cache(maxsize=None)
+def compile_rules(rules):
+    """
+    Compiles a declarative rule set into a checker which gathers everything the rules need in a
+    single pass over a string, with forbidden substrings matched by one compiled regex.
+
+    Parameters
+    ----------
+    rules : tuple of tuple
+        The rule set, see PART1_RULES for the format. Parameters must be hashable, e.g.
+        forbidden substrings given as a tuple.
+
+    Raises
+    ------
+    Exception
+        Unknown rule encountered.
+
+    Returns
+    -------
+    check : function
+        Function taking a string (str) and returning the index of the first rule the string
+        fails (int), or -1 if the string is nice.
+
+    """
+    vowel_sets = {}
+    need_double = need_pair = False
+    gaps = []
+    forbidden = {}
+    for index, rule in enumerate(rules):
+        if rule[0] == 'vowels':
+            vowel_sets[index] = frozenset(rule[2] if len(rule) > 2 else 'aeiou')
+        elif rule[0] == 'double':
+            need_double = True
+        elif rule[0] == 'repeated_pair':
+            need_pair = True
+        elif rule[0] == 'gapped_repeat':
+            gaps.append(rule[1])
+        elif rule[0] == 'forbidden':
+            # an empty regex would match every string, but forbidding nothing rejects none
+            forbidden[index] = re.compile('|'.join(map(re.escape, rule[1]))) if rule[1] else None
+        else:
+            raise Exception(f'Unknown rule: {rule[0]}')
+
+    def check(string):
+        vowels = dict.fromkeys(vowel_sets, 0)
+        double = repeated_pair = False
+        gapped = dict.fromkeys(gaps, False)
+        first_seen = {}
+        for i, char in enumerate(string):
+            for index, vowel_set in vowel_sets.items():
+                if char in vowel_set:
+                    vowels[index] += 1
+            if i > 0:
+                if need_double and string[i-1] == char:
+                    double = True
+                if need_pair and not repeated_pair and i - first_seen.setdefault(string[i-1:i+1], i) >= 2:
+                    repeated_pair = True
+            for gap in gaps:
+                if i > gap and string[i-gap-1] == char:
+                    gapped[gap] = True
+
+        for index, rule in enumerate(rules):
+            if rule[0] == 'vowels':
+                passed = vowels[index] >= rule[1]
+            elif rule[0] == 'double':
+                passed = double
+            elif rule[0] == 'repeated_pair':
+                passed = repeated_pair
+            elif rule[0] == 'gapped_repeat':
+                passed = gapped[rule[1]]
+            else:
+                passed = forbidden[index] is None or not forbidden[index].search(string)
+            if not passed:
+                return index
+
+        return -1
+
+    return check
+
+def rejection_counts(args):
+    """
+    Counts the number of strings in a block which are rejected by each rule in a rule set.
+
+    Parameters
+    ----------
+    args : tuple
+        The rule set (tuple of tuple) and the block of strings (list of str).
+
+    Returns
+    -------
+    counts : list of int
+        The number of strings rejected by each rule, followed by the number of nice strings.
+
+    """
+    rules, strings = args
+    check = compile_rules(rules)
+    counts = [0]*(len(rules) + 1)
+    for string in strings:
+        counts[check(string)] += 1
+
+    return counts
+
+def read_string_blocks(filename, block_lines):
+    """
+    Generator which reads the strings in an input file in blocks of a bounded number of lines.
+
+    Parameters
+    ----------
+    filename : str
+        Input file containing the strings to be judged.
+    block_lines : int
+        Maximum number of lines in each block.
+
+    Yields
+    ------
+    block : list of str
+        The non-empty strings in the next block of lines.
+
+    """
+    with open(filename) as file:
+        lines = list(islice(file, block_lines))
+        while lines:
+            yield [string for string in map(str.strip, lines) if string]
+            lines = list(islice(file, block_lines))
+
+def Day5_Filter(filename='Inputs/Day5_Inputs.txt', rules=PART1_RULES, processes=None,
+                block_lines=2**16):
+    """
+    Judges every string in an input file against a declarative rule set, streaming the file in
+    blocks which can be evaluated in parallel across a pool of processes.
+
+    Parameters
+    ----------
+    filename : str, optional
+        Input file containing the strings to be judged.
+        The default is 'Inputs/Day5_Inputs.txt'.
+    rules : tuple of tuple, optional
+        The rule set, see PART1_RULES for the format.
+        The default is PART1_RULES.
+    processes : int or None, optional
+        Number of worker processes to use, or None to evaluate every block in this process.
+        The default is None.
+    block_lines : int, optional
+        Maximum number of lines in each block.
+        The default is 2**16.
+
+    Returns
+    -------
+    nice : int
+        The number of nice strings in the input file.
+    rejections : list of int
+        The number of strings rejected by each rule, where each string is counted against the
+        first rule it fails.
+
+    """
+    # compile once up front so an invalid rule set fails before any work is sent to the pool
+    compile_rules(rules)
+    tasks = ((rules, block) for block in read_string_blocks(filename, block_lines))
+    totals = [0]*(len(rules) + 1)
+
+    def add(counts):
+        for i, count in enumerate(counts):
+            totals[i] += count
+
+    if processes is None:
+        for counts in map(rejection_counts, tasks):
+            add(counts)
+    else:
+        with Pool(processes) as pool:
+            for counts in bounded_imap(pool, rejection_counts, tasks, 2*processes):
+                add(counts)
+
+    nice = totals[-1]
+    rejections = totals[:-1]
+
+    return nice, rejections
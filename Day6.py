@@ -1,3 +1,4 @@
+import time
 import numpy as np
 
 class Instruction:
@@ -37,15 +38,9 @@ class Instruction:
         """
         return '{}({}, {})'.format(self.__class__.__name__, self.type, self.coords)
 
-def Day6_Part1(filename='Inputs/Day6_Inputs.txt'):
+def read_instructions(filename='Inputs/Day6_Inputs.txt'):
     """
-    Returns the number of lights out of an 1000 x 1000 grid which are lit after following a set of
-    instructions given in an input file, with all lights starting as off.
-
-    e.g. "turn on 0,0 through 999,999" would turn on (or leave on) every light
-    "toggle 0,0 through 999,0" would toggle the first line of 1000 lights, turning off the ones
-    that were on, and turning on the ones that were off
-    "turn off 499,499 through 500,500" would turn off (or leave off) the middle four lights
+    Reads the instructions for controlling the lights from an input file.
 
     Parameters
     ----------
@@ -55,8 +50,8 @@ def Day6_Part1(filename='Inputs/Day6_Inputs.txt'):
 
     Returns
     -------
-    lit_number : int
-        The number of lights which are lit.
+    instructions : list of Instruction
+        The instructions in order.
 
     """
     file = open(filename)
@@ -73,23 +68,56 @@ def Day6_Part1(filename='Inputs/Day6_Inputs.txt'):
             instructions.append(Instruction(type_, [coords_from, coords_to]))
     file.close()
 
-    lights = np.zeros((1000, 1000))
+    return instructions
+
+def check_coordinates(instructions, size):
+    """
+    Checks that every instruction only affects lights within a size x size grid.
+
+    Parameters
+    ----------
+    instructions : list of Instruction
+        The instructions to check.
+    size : int
+        The width and height of the grid of lights.
+
+    Raises
+    ------
+    Exception
+        Coordinates outside the grid.
+
+    Returns
+    -------
+    None.
+
+    """
     for instruction in instructions:
-        if instruction.type == 'on':
-            lights[instruction.coords[0][0]:instruction.coords[1][0]+1,
-                   instruction.coords[0][1]:instruction.coords[1][1]+1] = 1
-        elif instruction.type == 'off':
-            lights[instruction.coords[0][0]:instruction.coords[1][0]+1,
-                   instruction.coords[0][1]:instruction.coords[1][1]+1] = 0
-        elif instruction.type == 'toggle':
-            lights[instruction.coords[0][0]:instruction.coords[1][0]+1,
-                   instruction.coords[0][1]:instruction.coords[1][1]+1] += 1
-            lights[instruction.coords[0][0]:instruction.coords[1][0]+1,
-                   instruction.coords[0][1]:instruction.coords[1][1]+1] %= 2
-        else:
-            raise Exception(f'Unrecognised instruction: {instruction.type}')
+        if not all(0 <= c < size for coords in instruction.coords for c in coords):
+            raise Exception(f'Coordinates outside the grid: {instruction.coords}')
+
+def Day6_Part1(filename='Inputs/Day6_Inputs.txt'):
+    """
+    Returns the number of lights out of an 1000 x 1000 grid which are lit after following a set of
+    instructions given in an input file, with all lights starting as off.
+
+    e.g. "turn on 0,0 through 999,999" would turn on (or leave on) every light
+    "toggle 0,0 through 999,0" would toggle the first line of 1000 lights, turning off the ones
+    that were on, and turning on the ones that were off
+    "turn off 499,499 through 500,500" would turn off (or leave off) the middle four lights
+
+    Parameters
+    ----------
+    filename : str, optional
+        Input file containing the instructions.
+        The default is 'Inputs/Day6_Inputs.txt'.
+
+    Returns
+    -------
+    lit_number : int
+        The number of lights which are lit.
 
-    lit_number = int(np.sum(lights))
+    """
+    lit_number = Day6_Dense(filename, part=1)
 
     return lit_number
 
@@ -115,35 +143,268 @@ def Day6_Part2(filename='Inputs/Day6_Inputs.txt'):
         The total brightness of all the lights.
 
     """
-    file = open(filename)
-    instructions = []
-    for line in file:
-        line = line.strip().split()
-        if len(line) > 0:
-            if line[0] == 'toggle':
-                type_ = line[0]
-            else:
-                type_ = line[1]
-            coords_from = tuple([int(i) for i in line[-3].split(',')])
-            coords_to = tuple([int(i) for i in line[-1].split(',')])
-            instructions.append(Instruction(type_, [coords_from, coords_to]))
-    file.close()
+    total_brightness = Day6_Dense(filename, part=2)
+
+    return total_brightness
+
+def Day6_Compressed(filename='Inputs/Day6_Inputs.txt', part=1, size=1000):
+    """
+    Returns the number of lit lights (part 1) or the total brightness (part 2) of a size x size
+    grid of lights after following a set of instructions given in an input file, using
+    coordinate compression. The grid is only split at the edges of the instruction rectangles,
+    so each compressed cell is a block of lights which are always treated identically and is
+    weighted by its area. The cost depends on the number of instructions, not the grid size.
+
+    Parameters
+    ----------
+    filename : str, optional
+        Input file containing the instructions.
+        The default is 'Inputs/Day6_Inputs.txt'.
+    part : int, optional
+        Which part's meaning of the instructions to use, 1 or 2.
+        The default is 1.
+    size : int, optional
+        The width and height of the grid of lights.
+        The default is 1000.
+
+    Raises
+    ------
+    Exception
+        Unrecognised instruction or coordinates outside the grid.
+
+    Returns
+    -------
+    total : int
+        The number of lights which are lit (part 1) or their total brightness (part 2).
+
+    """
+    instructions = read_instructions(filename)
+    check_coordinates(instructions, size)
+
+    # boundaries of the compressed cells along each axis
+    edges = [np.unique([0, size] + [instruction.coords[0][axis] for instruction in instructions]
+                       + [instruction.coords[1][axis] + 1 for instruction in instructions])
+             for axis in [0, 1]]
+    lights = np.zeros((len(edges[0]) - 1, len(edges[1]) - 1), dtype=np.uint8 if part == 1 else np.int64)
 
-    lights = np.zeros((1000, 1000))
     for instruction in instructions:
+        x_from, x_to = np.searchsorted(edges[0], [instruction.coords[0][0], instruction.coords[1][0] + 1])
+        y_from, y_to = np.searchsorted(edges[1], [instruction.coords[0][1], instruction.coords[1][1] + 1])
+        cells = lights[x_from:x_to, y_from:y_to]
         if instruction.type == 'on':
-            lights[instruction.coords[0][0]:instruction.coords[1][0]+1,
-                   instruction.coords[0][1]:instruction.coords[1][1]+1] += 1
+            if part == 1:
+                cells[...] = 1
+            else:
+                cells += 1
         elif instruction.type == 'off':
-            lights[instruction.coords[0][0]:instruction.coords[1][0]+1,
-                   instruction.coords[0][1]:instruction.coords[1][1]+1] -= 1
-            lights[lights < 0] = 0
+            if part == 1:
+                cells[...] = 0
+            else:
+                cells -= 1
+                np.maximum(cells, 0, out=cells)
         elif instruction.type == 'toggle':
-            lights[instruction.coords[0][0]:instruction.coords[1][0]+1,
-                   instruction.coords[0][1]:instruction.coords[1][1]+1] += 2
+            if part == 1:
+                cells ^= 1
+            else:
+                cells += 2
         else:
             raise Exception(f'Unrecognised instruction: {instruction.type}')
 
+    areas = np.outer(np.diff(edges[0]), np.diff(edges[1]))
+    total = int(np.sum(areas*lights))
+
+    return total
+
+# number of set bits in every byte value
+POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+def packed_mask(y_from, y_to):
+    """
+    Returns the range of bytes and the bit mask within them covering a range of columns of a
+    bit-packed grid, where column y is held in bit 7 - y%8 of byte y//8 (as in np.packbits).
+
+    Parameters
+    ----------
+    y_from : int
+        The first column in the range.
+    y_to : int
+        One past the last column in the range.
+
+    Returns
+    -------
+    byte_from : int
+        The first byte containing a column in the range.
+    byte_to : int
+        One past the last byte containing a column in the range.
+    mask : numpy.ndarray of uint8
+        The bits of each byte which are in the range.
+
+    """
+    byte_from, byte_to = y_from//8, -(-y_to//8)
+    bits = np.zeros(8*(byte_to - byte_from), dtype=bool)
+    bits[y_from - 8*byte_from:y_to - 8*byte_from] = True
+
+    return byte_from, byte_to, np.packbits(bits)
+
+def Day6_Dense(filename='Inputs/Day6_Inputs.txt', part=1, size=1000, packed=False, report=False):
+    """
+    Returns the number of lit lights (part 1) or the total brightness (part 2) of a size x size
+    grid of lights after following a set of instructions given in an input file, using a dense
+    grid with compact storage and in-place updates of only the affected lights. Part 1 uses one
+    byte per light (or one bit per light if packed), toggled in place. Part 2 uses the smallest
+    unsigned integer brightness per light which cannot overflow, since no light can be brighter
+    than twice the number of instructions, with "turn off" clamped only within its own
+    rectangle.
+
+    Parameters
+    ----------
+    filename : str, optional
+        Input file containing the instructions.
+        The default is 'Inputs/Day6_Inputs.txt'.
+    part : int, optional
+        Which part's meaning of the instructions to use, 1 or 2.
+        The default is 1.
+    size : int, optional
+        The width and height of the grid of lights.
+        The default is 1000.
+    packed : bool, optional
+        Whether to store the part 1 grid with one bit per light.
+        The default is False.
+    report : bool, optional
+        Whether to also return a report of the memory and time used.
+        The default is False.
+
+    Raises
+    ------
+    Exception
+        Unrecognised instruction or coordinates outside the grid.
+
+    Returns
+    -------
+    total : int
+        The number of lights which are lit (part 1) or their total brightness (part 2).
+    usage : dict
+        Only returned if report is True. The 'grid_bytes' of the grid and, for each of the
+        'instructions', its 'type', the number of 'bytes' of the grid it updated and the
+        'seconds' it took.
+
+    """
+    instructions = read_instructions(filename)
+    check_coordinates(instructions, size)
+    if part == 1 and packed:
+        lights = np.zeros((size, -(-size//8)), dtype=np.uint8)
+    elif part == 1:
+        lights = np.zeros((size, size), dtype=bool)
+    else:
+        lights = np.zeros((size, size), dtype=np.min_scalar_type(2*len(instructions)))
+
+    usage = {'grid_bytes' : lights.nbytes, 'instructions' : []}
+    for instruction in instructions:
+        start = time.perf_counter()
+        rows = slice(instruction.coords[0][0], instruction.coords[1][0]+1)
+        y_from, y_to = instruction.coords[0][1], instruction.coords[1][1]+1
+        if part == 1 and packed:
+            byte_from, byte_to, mask = packed_mask(y_from, y_to)
+            cells = lights[rows, byte_from:byte_to]
+            if instruction.type == 'on':
+                cells |= mask
+            elif instruction.type == 'off':
+                cells &= ~mask
+            elif instruction.type == 'toggle':
+                cells ^= mask
+            else:
+                raise Exception(f'Unrecognised instruction: {instruction.type}')
+        else:
+            cells = lights[rows, y_from:y_to]
+            if instruction.type == 'on':
+                if part == 1:
+                    cells[...] = True
+                else:
+                    cells += 1
+            elif instruction.type == 'off':
+                if part == 1:
+                    cells[...] = False
+                else:
+                    np.subtract(cells, 1, out=cells, where=cells > 0)
+            elif instruction.type == 'toggle':
+                if part == 1:
+                    np.logical_not(cells, out=cells)
+                else:
+                    cells += 2
+            else:
+                raise Exception(f'Unrecognised instruction: {instruction.type}')
+        usage['instructions'].append({'type' : instruction.type, 'bytes' : cells.nbytes,
+                                      'seconds' : time.perf_counter() - start})
+
+    if part == 1 and packed:
+        total = int(np.sum(POPCOUNT[lights], dtype=np.int64))
+    else:
+        total = int(np.sum(lights, dtype=np.int64))
+
+    if report:
+        return total, usage
+    return total
+
+def Day6_Difference(filename='Inputs/Day6_Inputs.txt', size=1000):
+    """
+    Returns the total brightness of a size x size grid of lights after following a set of
+    instructions given in an input file, with the meanings from part 2. Runs of the purely
+    additive "turn on" and "toggle" instructions are recorded in a 2D difference array, touching
+    only the four corners of each rectangle, and are only added to the grid (with one 2D prefix
+    sum) when a clamping "turn off" arrives or the instructions end.
+
+    Parameters
+    ----------
+    filename : str, optional
+        Input file containing the instructions.
+        The default is 'Inputs/Day6_Inputs.txt'.
+    size : int, optional
+        The width and height of the grid of lights.
+        The default is 1000.
+
+    Raises
+    ------
+    Exception
+        Unrecognised instruction or coordinates outside the grid.
+
+    Returns
+    -------
+    total_brightness : int
+        The total brightness of all the lights.
+
+    """
+    instructions = read_instructions(filename)
+    check_coordinates(instructions, size)
+    lights = np.zeros((size, size), dtype=np.int64)
+    difference = np.zeros((size + 1, size + 1), dtype=np.int64)
+    pending = False
+
+    def flush():
+        np.add(lights, np.cumsum(np.cumsum(difference, axis=0), axis=1)[:size, :size], out=lights)
+        difference[...] = 0
+
+    for instruction in instructions:
+        x_from, x_to = instruction.coords[0][0], instruction.coords[1][0]+1
+        y_from, y_to = instruction.coords[0][1], instruction.coords[1][1]+1
+        if instruction.type in ('on', 'toggle'):
+            change = 1 if instruction.type == 'on' else 2
+            difference[x_from, y_from] += change
+            difference[x_from, y_to] -= change
+            difference[x_to, y_from] -= change
+            difference[x_to, y_to] += change
+            pending = True
+        elif instruction.type == 'off':
+            if pending:
+                flush()
+                pending = False
+            cells = lights[x_from:x_to, y_from:y_to]
+            np.subtract(cells, 1, out=cells, where=cells > 0)
+        else:
+            raise Exception(f'Unrecognised instruction: {instruction.type}')
+
+    if pending:
+        flush()
+
     total_brightness = int(np.sum(lights))
 
     return total_brightness
@@ -1,3 +1,457 @@
+import time
+import numpy as np
+from collections import deque
+
+# operation codes of the compiled circuit
+SET, AND, OR, NOT, LSHIFT, RSHIFT = range(6)
+OPERATIONS = {'AND' : AND, 'OR' : OR, 'NOT' : NOT, 'LSHIFT' : LSHIFT, 'RSHIFT' : RSHIFT}
+
+class Gate:
+    """
+    Class describing a logic gate which drives a wire of a circuit.
+    """
+    __slots__ = ('op', 'inputs', 'output')
+
+    def __init__(self, op, inputs, output):
+        """
+        Initialise the class with three parameters.
+
+        Parameters
+        ----------
+        op : int
+            The operation code of the gate, one of SET, AND, OR, NOT, LSHIFT and RSHIFT.
+        inputs : list of str or int
+            The input wires (str) or literal signals (int) of the gate.
+        output : str
+            The wire driven by the gate.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.op = op
+        self.inputs = inputs
+        self.output = output
+
+    def __repr__(self):
+        """
+        Return the representation of a Gate object.
+
+        Returns
+        -------
+        str
+            Representation.
+
+        """
+        return f'{self.__class__.__name__}({self.op}, {self.inputs}, {self.output})'
+
+    @classmethod
+    def parse(cls, line):
+        """
+        Create a Gate from a line of the circuit description, e.g. 'x AND y -> z'.
+
+        Parameters
+        ----------
+        line : str
+            The line describing the gate.
+
+        Raises
+        ------
+        Exception
+            Unrecognised gate.
+
+        Returns
+        -------
+        Gate
+            The gate described by the line.
+
+        """
+        signal, output = line.split(' -> ')
+        signal = signal.split()
+        operand = lambda token : int(token) if token.isdigit() else token
+        if len(signal) == 1:
+            return cls(SET, [operand(signal[0])], output)
+        elif len(signal) == 2 and signal[0] == 'NOT':
+            return cls(NOT, [operand(signal[1])], output)
+        elif len(signal) == 3 and signal[1] in OPERATIONS:
+            return cls(OPERATIONS[signal[1]], [operand(signal[0]), operand(signal[2])], output)
+        raise Exception(f'Unrecognised gate: {line}')
+
+class Circuit:
+    """
+    Class describing a circuit of wires connected by logic gates, compiled into a program which
+    evaluates every wire exactly once in topological order.
+    """
+    def __init__(self, gates):
+        """
+        Initialise the class with one parameter, topologically sorting the gates and compiling
+        them into a program over integer wire indices.
+
+        Parameters
+        ----------
+        gates : iterable of Gate
+            The gates of the circuit.
+
+        Raises
+        ------
+        Exception
+            A wire is driven twice, is never driven or is part of a loop.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.gates = {}
+        for gate in gates:
+            if gate.output in self.gates:
+                raise Exception('Overlapping signals')
+            self.gates[gate.output] = gate
+
+        # Kahn's algorithm, counting the unevaluated inputs of every gate
+        waiting = {}
+        readers = {wire : [] for wire in self.gates}
+        for wire, gate in self.gates.items():
+            inputs = [i for i in gate.inputs if type(i) == str]
+            for i in inputs:
+                if i not in self.gates:
+                    raise Exception(f'Undriven wire: {i}')
+                readers[i].append(wire)
+            waiting[wire] = len(inputs)
+        ready = deque(wire for wire, count in waiting.items() if count == 0)
+        self.order = []
+        while ready:
+            wire = ready.popleft()
+            self.order.append(wire)
+            for reader in readers[wire]:
+                waiting[reader] -= 1
+                if waiting[reader] == 0:
+                    ready.append(reader)
+        if len(self.order) != len(self.gates):
+            raise Exception('Circuit contains a loop')
+        self.readers = readers
+
+        # wires take the first indices in topological order, followed by one slot per literal
+        self.index = {wire : n for n, wire in enumerate(self.order)}
+        self.literals = []
+        self.program = []
+        for wire in self.order:
+            operands = []
+            for i in self.gates[wire].inputs:
+                if type(i) == str:
+                    operands.append(self.index[i])
+                else:
+                    operands.append(len(self.order) + len(self.literals))
+                    self.literals.append(i & 0xFFFF)
+            operands += [None]*(2 - len(operands))
+            self.program.append((self.gates[wire].op, self.index[wire], *operands))
+
+        # state for incremental evaluation
+        self.values = None
+        self.overrides = {}
+        self.cones = {}
+
+    def __repr__(self):
+        """
+        Return the representation of a Circuit object.
+
+        Returns
+        -------
+        str
+            Representation.
+
+        """
+        return f'{self.__class__.__name__}({len(self.order)} wires)'
+
+    @classmethod
+    def from_file(cls, filename='Inputs/Day7_Inputs.txt'):
+        """
+        Create a Circuit from an input file with one gate per line.
+
+        Parameters
+        ----------
+        filename : str, optional
+            Input file containing the connections.
+            The default is 'Inputs/Day7_Inputs.txt'.
+
+        Returns
+        -------
+        Circuit
+            The compiled circuit.
+
+        """
+        with open(filename) as file:
+            return cls(Gate.parse(line.strip()) for line in file if line.strip())
+
+    @staticmethod
+    def run(program, values):
+        """
+        Runs a compiled program over a list of 16-bit signals, filling in the value of every
+        wire in order.
+
+        Parameters
+        ----------
+        program : list of tuple
+            The operation code, output index and input indices of every gate in order.
+        values : list of int
+            The signal of every wire followed by every literal, updated in place.
+
+        Returns
+        -------
+        None.
+
+        """
+        for op, out, a, b in program:
+            if op == SET:
+                values[out] = values[a]
+            elif op == AND:
+                values[out] = values[a] & values[b]
+            elif op == OR:
+                values[out] = values[a] | values[b]
+            elif op == NOT:
+                values[out] = ~values[a] & 0xFFFF
+            elif op == LSHIFT:
+                values[out] = (values[a] << values[b]) & 0xFFFF
+            else:
+                values[out] = values[a] >> values[b]
+
+    def evaluate(self, overrides=None, report=False):
+        """
+        Evaluates the 16-bit signal in every wire of the circuit.
+
+        Parameters
+        ----------
+        overrides : dict(str : int) or None, optional
+            Wires whose gates are replaced by a fixed signal.
+            The default is None.
+        report : bool, optional
+            Whether to also return the time taken to evaluate the circuit.
+            The default is False.
+
+        Returns
+        -------
+        signals : dict(str : int)
+            The signal in every wire.
+        seconds : float
+            Only returned if report is True. The time taken to evaluate the circuit.
+
+        """
+        start = time.perf_counter()
+        values = [0]*len(self.order) + self.literals
+        program = self.program
+        if overrides:
+            overridden = {self.index[wire] for wire in overrides}
+            program = [step for step in program if step[1] not in overridden]
+            for wire, value in overrides.items():
+                values[self.index[wire]] = value & 0xFFFF
+        self.run(program, values)
+        signals = dict(zip(self.order, values))
+        seconds = time.perf_counter() - start
+
+        if report:
+            return signals, seconds
+        return signals
+
+    def evaluate_batch(self, assignments, outputs=None):
+        """
+        Evaluates the circuit for many input assignments at once in a single pass over the
+        compiled program, holding each wire's signals for every assignment in one lane of an
+        unsigned 16-bit NumPy array.
+
+        Parameters
+        ----------
+        assignments : dict(str : array_like of int)
+            Wires whose gates are replaced by fixed signals, with one signal per assignment.
+            Every array must have the same length N, and scalars are applied to all assignments.
+        outputs : list of str or None, optional
+            The wires to return, or None to return every wire.
+            The default is None.
+
+        Returns
+        -------
+        signals : dict(str : numpy.ndarray of uint16)
+            The N signals in each output wire.
+
+        """
+        assignments = {wire : np.asarray(value).astype(np.uint16) for wire, value in assignments.items()}
+        lanes = max([value.size for value in assignments.values() if value.ndim > 0], default=1)
+
+        values = [None]*len(self.order) + [np.uint16(literal) for literal in self.literals]
+        for wire, value in assignments.items():
+            values[self.index[wire]] = value
+        overridden = {self.index[wire] for wire in assignments}
+        for op, out, a, b in self.program:
+            if out in overridden:
+                continue
+            if op == SET:
+                values[out] = values[a]
+            elif op == AND:
+                values[out] = values[a] & values[b]
+            elif op == OR:
+                values[out] = values[a] | values[b]
+            elif op == NOT:
+                values[out] = ~values[a]
+            elif op == LSHIFT:
+                values[out] = values[a] << values[b]
+            else:
+                values[out] = values[a] >> values[b]
+
+        signals = {wire : np.broadcast_to(values[self.index[wire]], (lanes,)).copy()
+                   for wire in (self.order if outputs is None else outputs)}
+
+        return signals
+
+    def signal(self, wire):
+        """
+        Returns the current 16-bit signal in a wire, evaluating the whole circuit the first time
+        any signal is requested (with overridden wires fixed rather than computed from their
+        gates) and keeping the signals up to date as wires are overridden.
+
+        Parameters
+        ----------
+        wire : str
+            The wire to read.
+
+        Returns
+        -------
+        int
+            The signal in the wire.
+
+        """
+        if self.values is None:
+            self.values = [0]*len(self.order) + self.literals
+            overridden = {self.index[wire_] for wire_ in self.overrides}
+            for wire_, value in self.overrides.items():
+                self.values[self.index[wire_]] = value
+            self.run([step for step in self.program if step[1] not in overridden], self.values)
+
+        return self.values[self.index[wire]]
+
+    def cone(self, wire):
+        """
+        Returns the program steps of every wire downstream of a wire, in topological order.
+
+        Parameters
+        ----------
+        wire : str
+            The wire whose downstream cone is found.
+
+        Returns
+        -------
+        list of tuple
+            The program steps of the downstream wires.
+
+        """
+        if wire not in self.cones:
+            seen = set()
+            stack = [wire]
+            while stack:
+                for reader in self.readers[stack.pop()]:
+                    if reader not in seen:
+                        seen.add(reader)
+                        stack.append(reader)
+            # wire indices are their positions in topological order
+            self.cones[wire] = [self.program[n] for n in sorted(self.index[reader] for reader in seen)]
+
+        return self.cones[wire]
+
+    def update(self, wire):
+        """
+        Recomputes the signals of every wire downstream of a wire whose signal has changed,
+        leaving overridden wires fixed.
+
+        Parameters
+        ----------
+        wire : str
+            The wire whose signal has changed.
+
+        Returns
+        -------
+        None.
+
+        """
+        overridden = {self.index[wire_] for wire_ in self.overrides}
+        self.run([step for step in self.cone(wire) if step[1] not in overridden], self.values)
+
+    def set_wire(self, wire, value):
+        """
+        Overrides the signal in a wire, replacing its gate with a fixed signal, and recomputes
+        only the wires downstream of it.
+
+        Parameters
+        ----------
+        wire : str
+            The wire to override.
+        value : int
+            The signal to fix the wire to.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.overrides[wire] = value & 0xFFFF
+        if self.values is not None:
+            self.values[self.index[wire]] = value & 0xFFFF
+            self.update(wire)
+
+    def clear_wire(self, wire):
+        """
+        Removes the override of a wire, restoring its gate, and recomputes only the wire and
+        the wires downstream of it.
+
+        Parameters
+        ----------
+        wire : str
+            The wire whose override is removed.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.overrides.pop(wire, None)
+        if self.values is not None:
+            self.run([self.program[self.index[wire]]], self.values)
+            self.update(wire)
+
+    def sweep(self, wire, values, output='a'):
+        """
+        Calculates the signal in an output wire for each of a series of overrides of an input
+        wire, recomputing only the downstream cone of the input wire for each override. Any
+        existing override of the input wire is restored afterwards.
+
+        Parameters
+        ----------
+        wire : str
+            The wire to override.
+        values : iterable of int
+            The signals to fix the wire to.
+        output : str, optional
+            The wire to read.
+            The default is 'a'.
+
+        Returns
+        -------
+        signals : list of int
+            The signal in the output wire for each override.
+
+        """
+        previous = self.overrides.get(wire)
+        signals = []
+        self.signal(output)
+        for value in values:
+            self.set_wire(wire, value)
+            signals.append(self.values[self.index[output]])
+
+        if previous is None:
+            self.clear_wire(wire)
+        else:
+            self.set_wire(wire, previous)
+
+        return signals
+
 def Day7_Part1(filename='Inputs/Day7_Inputs.txt'):
     """
     Evaluates the value of the 16-bit signal in every wire of a circuit in which the wires are
@@ -15,33 +469,7 @@ def Day7_Part1(filename='Inputs/Day7_Inputs.txt'):
         The value of the signal in wire 'a' once the circuit is fully evaluated.
     
     """
-    file = open(filename)
-    wires = {}
-    for line in file:
-        line = line.strip().split(' -> ')
-        if len(line) > 0:
-            if line[1] in wires:
-                raise Exception('Overlapping signals')
-            signal = line[0].replace('AND', '&').replace('OR', '|').replace('NOT', '~').split()
-            for i in range(len(signal)):
-                if type(signal[i]) == str and signal[i].islower():
-                    signal[i] = 'wires["' + signal[i] + '"]'
-            wires[line[1]] = ' '.join(signal).replace('LSHIFT', '<<').replace('RSHIFT', '>>')
-    file.close()
-
-    changed = True
-    while changed:
-        changed = False
-        for wire in wires:
-            if type(wires[wire]) == int:
-                continue
-            try:
-                wires[wire] = eval(wires[wire])%(2**16)
-                changed = True
-            except(TypeError):
-                pass
-
-    a_signal = wires['a']
+    a_signal = Circuit.from_file(filename).evaluate()['a']
 
     return a_signal
 
@@ -49,7 +477,8 @@ def Day7_Part2(filename='Inputs/Day7_Inputs.txt'):
     """
     Evaluates the value of the 16-bit signal in every wire of a circuit in which the wires are
     connected according to a series of logic gates specified in an input file, but with the signal
-    of wire 'b' overrided to the final value of wire 'a' from Part 1 (46,065).
+    of wire 'b' overrided to the final value of wire 'a' from Part 1. Only the wires downstream
+    of 'b' are recomputed after the override.
     
     Parameters
     ----------
@@ -63,34 +492,8 @@ def Day7_Part2(filename='Inputs/Day7_Inputs.txt'):
         The value of the signal in wire 'a' once the circuit is fully evaluated.
     
     """
-    file = open(filename)
-    wires = {}
-    for line in file:
-        line = line.strip().split(' -> ')
-        if len(line) > 0:
-            if line[1] in wires:
-                raise Exception('Overlapping signals')
-            signal = line[0].replace('AND', '&').replace('OR', '|').replace('NOT', '~').split()
-            for i in range(len(signal)):
-                if type(signal[i]) == str and signal[i].islower():
-                    signal[i] = 'wires["' + signal[i] + '"]'
-            wires[line[1]] = ' '.join(signal).replace('LSHIFT', '<<').replace('RSHIFT', '>>')
-    file.close()
-
-    wires['b'] = 46065
-
-    changed = True
-    while changed:
-        changed = False
-        for wire in wires:
-            if type(wires[wire]) == int:
-                continue
-            try:
-                wires[wire] = eval(wires[wire])%(2**16)
-                changed = True
-            except(TypeError):
-                pass
-
-    a_signal = wires['a']
+    circuit = Circuit.from_file(filename)
+    circuit.set_wire('b', circuit.signal('a'))
+    a_signal = circuit.signal('a')
 
     return a_signal
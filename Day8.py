@@ -1,3 +1,86 @@
+import re
+import numpy as np
+
+# escape sequences in a string literal, where the group is 'x' followed by two hexadecimal digits
+# for an escaped character code (3 characters longer in code than in memory), or the single
+# escaped character otherwise (1 character longer)
+ESCAPE = re.compile(rb'\\(x[0-9a-fA-F]{2}|.)')
+
+def scan_block(block):
+    """
+    Counts the characters of a block of complete lines of encoded string literals, without
+    evaluating them.
+
+    Parameters
+    ----------
+    block : bytes
+        Complete lines of encoded strings, one string literal per line.
+
+    Returns
+    -------
+    code_chars : int
+        The number of characters in the code representation of the strings.
+    mem_chars : int
+        The number of characters in the strings once in-memory.
+    encoded_chars : int
+        The number of characters in the code representations once encoded as new strings.
+
+    """
+    lines = [line for line in (line.strip() for line in block.split(b'\n')) if line]
+    code_chars = sum(map(len, lines))
+    escapes = ESCAPE.findall(block)
+    hex_escapes = sum(1 for escape in escapes if len(escape) == 3)
+    # the enclosing quotes are dropped in memory and each escape becomes one character
+    mem_chars = code_chars - 2*len(lines) - len(escapes) - 2*hex_escapes
+    # encoding adds enclosing quotes and escapes every quote and backslash
+    encoded_chars = code_chars + 2*len(lines) + block.count(b'"') + block.count(b'\\')
+
+    return code_chars, mem_chars, encoded_chars
+
+def Day8_Scan(filename='Inputs/Day8_Inputs.txt', chunk_size=2**20):
+    """
+    Counts the characters in the code representation, in memory and once re-encoded of a set of
+    encoded string literals given in an input file, in a single pass over the file streamed in
+    chunks. The escapes are tokenised directly, so the strings are never evaluated.
+
+    Parameters
+    ----------
+    filename : str, optional
+        Input file containing the encoded strings.
+        The default is 'Inputs/Day8_Inputs.txt'.
+    chunk_size : int, optional
+        Number of bytes read at a time.
+        The default is 2**20.
+
+    Returns
+    -------
+    code_chars : int
+        The number of characters in the code representation of the strings.
+    mem_chars : int
+        The number of characters in the strings once in-memory.
+    encoded_chars : int
+        The number of characters in the code representations once encoded as new strings.
+
+    """
+    totals = [0, 0, 0]
+    carry = b''
+    with open(filename, 'rb') as file:
+        chunk = file.read(chunk_size)
+        while chunk:
+            data = carry + chunk
+            # only scan complete lines, carrying any partial line into the next chunk
+            cut = data.rfind(b'\n') + 1
+            block, carry = data[:cut], data[cut:]
+            for i, count in enumerate(scan_block(block)):
+                totals[i] += count
+            chunk = file.read(chunk_size)
+    for i, count in enumerate(scan_block(carry)):
+        totals[i] += count
+
+    code_chars, mem_chars, encoded_chars = totals
+
+    return code_chars, mem_chars, encoded_chars
+
 def Day8_Part1(filename='Inputs/Day8_Inputs.txt'):
     """
     Calculates the difference between the number of characters in the code representation of a set
@@ -16,15 +99,7 @@ def Day8_Part1(filename='Inputs/Day8_Inputs.txt'):
         The difference between the number of characters.
 
     """
-    file = open(filename)
-    code_chars = 0
-    mem_chars = 0
-    for line in file:
-        line = line.strip().split(' -> ')
-        if len(line) > 0:
-            code_chars += len(line[0])
-            mem_chars += len(eval(line[0]))
-    file.close()
+    code_chars, mem_chars = Day8_Scan(filename)[:2]
 
     diff = code_chars - mem_chars
 
@@ -48,21 +123,50 @@ def Day8_Part2(filename='Inputs/Day8_Inputs.txt'):
         The difference between the number of characters.
 
     """
-    file = open(filename)
-    orig_chars = 0
-    encoded_chars = 0
-    for line in file:
-        line = line.strip().split(' -> ')
-        if len(line) > 0:
-            orig_chars += len(line[0])
-            for char in line[0]:
-                if char.isalnum():
-                    encoded_chars += 1
-                else:
-                    encoded_chars += 2
-            encoded_chars += 2
-    file.close()
+    orig_chars, encoded_chars = Day8_Scan(filename)[::2]
 
     diff = encoded_chars - orig_chars
 
     return diff
+
+def Day8_Part2_numpy(filename='Inputs/Day8_Inputs.txt', per_line=False):
+    """
+    Calculates the difference between the number of characters in the code representation of a set
+    of encoded string literals given in an input file and the number of characters in each code
+    representation once encoded as a new string, using vectorised byte comparisons. Encoding a
+    line adds two enclosing quotes and one character for every quote and backslash in it, so the
+    special bytes are counted with one cumulative sum and split into lines at the newline offsets.
+
+    Parameters
+    ----------
+    filename : str, optional
+        Input file containing the encoded strings.
+        The default is 'Inputs/Day8_Inputs.txt'.
+    per_line : bool, optional
+        Whether to also return the difference for each line.
+        The default is False.
+
+    Returns
+    -------
+    diff : int
+        The difference between the number of characters.
+    line_diffs : numpy.ndarray of int
+        Only returned if per_line is True. The difference for each non-empty line.
+
+    """
+    data = np.fromfile(filename, dtype=np.uint8)
+    special = np.zeros(len(data) + 1, dtype=np.int64)
+    np.cumsum((data == ord('"')) | (data == ord('\\')), out=special[1:])
+    content = np.zeros(len(data) + 1, dtype=np.int64)
+    np.cumsum(~np.isin(data, np.frombuffer(b' \t\r\n', dtype=np.uint8)), out=content[1:])
+
+    # offsets splitting the file into lines, including any final line without a newline
+    cuts = np.concatenate(([0], np.flatnonzero(data == ord('\n')), [len(data)]))
+    lines = np.diff(content[cuts]) > 0
+    line_diffs = np.diff(special[cuts])[lines] + 2
+
+    diff = int(np.sum(line_diffs))
+
+    if per_line:
+        return diff, line_diffs
+    return diff
@@ -1,4 +1,7 @@
 import numpy as np
+from functools import partial
+from multiprocessing import Pool, Value
+from graph import WeightedGraph
 
 def minKey(dictionary):
     """
@@ -93,8 +96,6 @@ def Day9_Part1(filename='Inputs/Day9_Inputs.txt'):
 
     return shortest_route, shortest_distance
 
-from itertools import permutations
-
 def Day9_Part1a(filename='Inputs/Day9_Inputs.txt'):
     """
     Calculates the shortest possible route between a set of locations while visiting each location
@@ -114,30 +115,11 @@ def Day9_Part1a(filename='Inputs/Day9_Inputs.txt'):
         The length of the shortest route through every location.
 
     """
-    file = open(filename)
-    distances = {}
-    for line in file:
-        line = line.strip().split(' -> ')
-        if len(line) > 0:
-            route, dist = line[0].split(' = ')
-            route = route.split(' to ')
-            for i in [0, 1]:
-                if route[i] in distances:
-                    distances[route[i]][route[(i+1)%2]] = int(dist)
-                else:
-                    distances[route[i]] = {route[(i+1)%2] : int(dist)}
-    file.close()
-
-    shortest_route, shortest_distance = None, 1000
+    graph = read_graph(filename)
+    shortest_route, shortest_distance = graph.best_route()
+    shortest_route = [graph.names[i] for i in shortest_route]
 
-    for route in permutations(distances):
-        dist = 0
-        for i in range(len(route) - 1):
-            dist += distances[route[i]][route[i+1]]
-        if dist < shortest_distance:
-            shortest_route, shortest_distance = route, dist
-
-    return list(shortest_route), shortest_distance
+    return shortest_route, int(shortest_distance)
 
 def Day9_Part2(filename='Inputs/Day9_Inputs.txt'):
     """
@@ -157,28 +139,580 @@ def Day9_Part2(filename='Inputs/Day9_Inputs.txt'):
     longest_distance : int
         The length of the longest route through every location.
 
+    """
+    graph = read_graph(filename)
+    longest_route, longest_distance = graph.best_route(longest=True)
+    longest_route = [graph.names[i] for i in longest_route]
+
+    return longest_route, int(longest_distance)
+
+def read_graph(filename='Inputs/Day9_Inputs.txt'):
+    """
+    Reads the distances between every pair of locations from an input file into a graph.
+
+    Parameters
+    ----------
+    filename : str, optional
+        Input file containing the distances between locations.
+        The default is 'Inputs/Day9_Inputs.txt'.
+
+    Returns
+    -------
+    WeightedGraph
+        The graph of the locations, indexed in order of first appearance, weighted by distance
+        with inf where no distance is given.
+
     """
     file = open(filename)
-    distances = {}
+    routes = []
     for line in file:
-        line = line.strip().split(' -> ')
+        line = line.strip()
         if len(line) > 0:
-            route, dist = line[0].split(' = ')
-            route = route.split(' to ')
-            for i in [0, 1]:
-                if route[i] in distances:
-                    distances[route[i]][route[(i+1)%2]] = int(dist)
-                else:
-                    distances[route[i]] = {route[(i+1)%2] : int(dist)}
+            route, dist = line.split(' = ')
+            start, end = route.split(' to ')
+            routes.append((start, end, int(dist)))
     file.close()
 
-    longest_route, longest_distance = None, 0
+    return WeightedGraph.from_edges(routes, symmetric=True)
+
+def read_distances(filename='Inputs/Day9_Inputs.txt'):
+    """
+    Reads the distances between every pair of locations from an input file into a matrix.
+
+    Parameters
+    ----------
+    filename : str, optional
+        Input file containing the distances between locations.
+        The default is 'Inputs/Day9_Inputs.txt'.
+
+    Returns
+    -------
+    locations : list of str
+        The name of each location, in order of first appearance.
+    distances : numpy.ndarray of float
+        The distance between each pair of locations, indexed in the same order as locations,
+        with inf where no distance is given.
+
+    """
+    graph = read_graph(filename)
+
+    return graph.names, graph.weights
+
+def held_karp(distances, longest=False):
+    """
+    Finds the shortest (or longest) route which visits every location exactly once, starting
+    and ending anywhere, using the Held-Karp dynamic programme over subsets of locations. For
+    every subset and final location, the best route through that subset is built from the best
+    routes through the subset without its final location, vectorised over all subsets of the
+    same size. Takes O(2^n n^2) time and O(2^n n) memory for n locations.
+
+    Parameters
+    ----------
+    distances : numpy.ndarray of float
+        The distance between each pair of locations, with inf where there is no route.
+    longest : bool, optional
+        Whether to find the longest route rather than the shortest.
+        The default is False.
+
+    Returns
+    -------
+    route : list of int
+        The indices of the locations in the order they are visited, or None if no route
+        visits every location.
+    distance : float
+        The length of the route.
+
+    """
+    n = len(distances)
+    weights = np.where(np.isinf(distances), np.inf, -distances if longest else distances)
+    masks = np.arange(2**n)
+    sizes = np.zeros(2**n, dtype=np.int8)
+    for j in range(n):
+        sizes += (masks >> j) & 1
+
+    # best[mask, j] is the best length of a route through the locations in mask ending at j
+    best = np.full((2**n, n), np.inf)
+    previous = np.full((2**n, n), -1, dtype=np.int8)
+    best[2**np.arange(n), np.arange(n)] = 0
+    for size in range(2, n + 1):
+        layer = masks[sizes == size]
+        for j in range(n):
+            ending = layer[(layer >> j) & 1 == 1]
+            candidates = best[ending ^ (1 << j)] + weights[:, j]
+            choice = np.argmin(candidates, axis=1)
+            best[ending, j] = candidates[np.arange(len(ending)), choice]
+            previous[ending, j] = choice
+
+    mask = 2**n - 1
+    end = int(np.argmin(best[mask]))
+    if np.isinf(best[mask, end]):
+        return None, np.inf
+    distance = -best[mask, end] if longest else best[mask, end]
+
+    route = [end]
+    while previous[mask, route[-1]] >= 0:
+        before = int(previous[mask, route[-1]])
+        mask ^= 1 << route[-1]
+        route.append(before)
+
+    return route[::-1], float(distance)
+
+def Day9_HeldKarp(filename='Inputs/Day9_Inputs.txt'):
+    """
+    Calculates both the shortest and longest possible routes between a set of locations while
+    visiting each location exactly once, given the distances between every location in an input
+    file, exactly using the Held-Karp dynamic programme.
+
+    Parameters
+    ----------
+    filename : str, optional
+        Input file containing the distances between locations.
+        The default is 'Inputs/Day9_Inputs.txt'.
+
+    Returns
+    -------
+    shortest_route : list of str
+        The shortest route through every location in order.
+    shortest_distance : int
+        The length of the shortest route through every location.
+    longest_route : list of str
+        The longest route through every location in order.
+    longest_distance : int
+        The length of the longest route through every location.
+
+    """
+    locations, distances = read_distances(filename)
+
+    shortest_route, shortest_distance = held_karp(distances)
+    longest_route, longest_distance = held_karp(distances, longest=True)
+
+    shortest_route = [locations[i] for i in shortest_route]
+    longest_route = [locations[i] for i in longest_route]
+
+    return shortest_route, int(shortest_distance), longest_route, int(longest_distance)
+
+def mst_bound(weights, end, remaining):
+    """
+    Lower bound on the length of the rest of a route ending at a location which must still visit
+    a set of remaining locations: the rest of the route spans the end and remaining locations,
+    so it is at least as long as their minimum spanning tree (found with Prim's algorithm). The
+    tree is undirected, so for asymmetric distances the weights must first be reduced to the
+    shorter direction of each edge, see lower_bound.
+
+    Parameters
+    ----------
+    weights : list of list of float
+        The distance between each pair of locations.
+    end : int
+        The current final location of the route.
+    remaining : set of int
+        The locations still to be visited.
+
+    Returns
+    -------
+    total : float
+        The lower bound.
+
+    """
+    key = {location : weights[end][location] for location in remaining}
+    total = 0
+    while key:
+        nearest = min(key, key=key.get)
+        total += key.pop(nearest)
+        for location in key:
+            if weights[nearest][location] < key[location]:
+                key[location] = weights[nearest][location]
+
+    return total
+
+def edge_bound(weights, end, remaining):
+    """
+    Lower bound on the length of the rest of a route ending at a location which must still visit
+    a set of remaining locations: every remaining location is entered exactly once from the end
+    location or another remaining location, so the rest of the route is at least as long as the
+    sum of the shortest such edge into each remaining location.
+
+    Parameters
+    ----------
+    weights : list of list of float
+        The distance between each pair of locations.
+    end : int
+        The current final location of the route.
+    remaining : set of int
+        The locations still to be visited.
+
+    Returns
+    -------
+    total : float
+        The lower bound.
+
+    """
+    sources = remaining | {end}
+    total = 0
+    for location in remaining:
+        total += min(weights[source][location] for source in sources if source != location)
+
+    return total
+
+BOUNDS = {'mst' : mst_bound, 'edges' : edge_bound}
+
+def lower_bound(weights, bound, symmetric):
+    """
+    Returns a lower bound function over a set of distances.
+
+    Parameters
+    ----------
+    weights : list of list of float
+        The distance between each pair of locations.
+    bound : str
+        The name of the lower bound function, see BOUNDS.
+    symmetric : bool
+        Whether the distances are the same in both directions.
+
+    Returns
+    -------
+    function
+        The lower bound function, taking the end location (int) and remaining locations (set of
+        int) and returning the lower bound (float).
+
+    """
+    if bound == 'mst' and not symmetric:
+        weights = np.minimum(weights, np.transpose(weights)).tolist()
+
+    return partial(BOUNDS[bound], weights)
+
+class Incumbent:
+    """
+    Class holding the best complete route found so far by a branch-and-bound search, optionally
+    sharing its length with searches running in other processes.
+    """
+    def __init__(self, cost=np.inf, route=None, shared=None):
+        """
+        Initialise the class with three parameters.
+
+        Parameters
+        ----------
+        cost : float, optional
+            The length of the best route so far.
+            The default is inf.
+        route : list of int or None, optional
+            The best route so far.
+            The default is None.
+        shared : multiprocessing.Value or None, optional
+            The length of the best route found by any process.
+            The default is None.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.cost = cost
+        self.route = route
+        self.shared = shared
+
+    def limit(self):
+        """
+        Returns the length a route must beat to be an improvement.
+
+        Returns
+        -------
+        float
+            The length of the best route found by this or any sharing process.
+
+        """
+        if self.shared is None:
+            return self.cost
+        return min(self.cost, self.shared.value)
+
+    def offer(self, cost, route):
+        """
+        Records a complete route if it is better than the best route so far.
+
+        Parameters
+        ----------
+        cost : float
+            The length of the route.
+        route : list of int
+            The route.
+
+        Returns
+        -------
+        bool
+            Whether the route was an improvement.
+
+        """
+        if cost >= self.limit():
+            return False
+        self.cost, self.route = cost, list(route)
+        if self.shared is not None:
+            with self.shared.get_lock():
+                self.shared.value = min(self.shared.value, cost)
+        return True
+
+def search(weights, route, cost, remaining, incumbent, bound, symmetric=False):
+    """
+    Generator performing a depth-first branch-and-bound search for the shortest route extending
+    a partial route, trying the nearest locations first and pruning any partial route whose
+    length plus a lower bound on the rest of the route cannot beat the incumbent. If the
+    distances are symmetric, only routes which start at a lower index than they end are
+    searched, since every other route is the reverse of one of these.
+
+    Parameters
+    ----------
+    weights : list of list of float
+        The distance between each pair of locations, with inf where there is no route.
+    route : list of int
+        The partial route, extended in place during the search.
+    cost : float
+        The length of the partial route.
+    remaining : set of int
+        The locations still to be visited.
+    incumbent : Incumbent
+        The best complete route found so far, updated during the search.
+    bound : function
+        The lower bound function, see lower_bound.
+    symmetric : bool, optional
+        Whether the distances are the same in both directions.
+        The default is False.
+
+    Yields
+    ------
+    tuple
+        The cost (float) and route (list of int) of each improving complete route.
+
+    """
+    if symmetric and route[0] > max(remaining, default=route[-1]):
+        return
+    if not remaining:
+        if incumbent.offer(cost, route):
+            yield incumbent.cost, incumbent.route
+        return
+
+    end = route[-1]
+    for location in sorted(remaining, key=lambda location : weights[end][location]):
+        extended = cost + weights[end][location]
+        if extended == np.inf:
+            break
+        rest = remaining - {location}
+        if extended + bound(location, rest) >= incumbent.limit():
+            continue
+        route.append(location)
+        yield from search(weights, route, extended, rest, incumbent, bound, symmetric)
+        route.pop()
+
+def nearest_neighbour(weights):
+    """
+    Finds a good starting route by always travelling to the nearest unvisited location, trying
+    every starting location.
+
+    Parameters
+    ----------
+    weights : list of list of float
+        The distance between each pair of locations, with inf where there is no route.
+
+    Returns
+    -------
+    best_route : list of int or None
+        The shortest route found, or None if none visits every location.
+    best_cost : float
+        The length of the route.
+
+    """
+    best_route, best_cost = None, np.inf
+    for start in range(len(weights)):
+        route, cost, remaining = [start], 0, set(range(len(weights))) - {start}
+        while remaining:
+            location = min(remaining, key=lambda location : weights[route[-1]][location])
+            cost += weights[route[-1]][location]
+            route.append(location)
+            remaining.remove(location)
+        if cost < best_cost:
+            best_route, best_cost = route, cost
+
+    return best_route, best_cost
+
+# length of the best route found by any worker process of the branch-and-bound pool
+shared_incumbent = None
+
+def init_worker(shared):
+    """
+    Stores the shared incumbent length in a worker process of the branch-and-bound pool.
+
+    Parameters
+    ----------
+    shared : multiprocessing.Value
+        The length of the best route found by any process.
+
+    Returns
+    -------
+    None.
+
+    """
+    global shared_incumbent
+    shared_incumbent = shared
+
+def search_subtree(args):
+    """
+    Searches every route starting with a given pair of locations, sharing the incumbent length
+    with the other worker processes.
+
+    Parameters
+    ----------
+    args : tuple
+        The distances (list of list of float), the first two locations of the routes (list of
+        int), the name of the lower bound function (str) and whether the distances are
+        symmetric (bool).
+
+    Returns
+    -------
+    tuple or None
+        The cost (float) and route (list of int) of the best route in the subtree which beat the
+        incumbent, or None if there is none.
+
+    """
+    weights, start, bound, symmetric = args
+    incumbent = Incumbent(shared=shared_incumbent)
+    remaining = set(range(len(weights))) - set(start)
+    for improvement in search(weights, list(start), weights[start[0]][start[1]], remaining,
+                              incumbent, lower_bound(weights, bound, symmetric), symmetric):
+        pass
+
+    if incumbent.route is None:
+        return None
+    return incumbent.cost, incumbent.route
+
+def branch_and_bound_routes(distances, longest=False, processes=None, bound='mst'):
+    """
+    Generator which finds the shortest (or longest) route visiting every location exactly once
+    by branch and bound, yielding each improving route as soon as it is found so the search can
+    be used as an anytime algorithm. The final route yielded is optimal.
+
+    When searching across processes, the workers share the length of the best route so far for
+    pruning, but each only returns its best route once its whole subtree has been searched, so
+    improving routes are yielded at subtree granularity rather than as soon as they are found.
+
+    Parameters
+    ----------
+    distances : numpy.ndarray of float
+        The distance between each pair of locations, with inf where there is no route.
+    longest : bool, optional
+        Whether to find the longest route rather than the shortest.
+        The default is False.
+    processes : int or None, optional
+        Number of worker processes to search subtrees (one per pair of starting locations)
+        across, or None to search in this process.
+        The default is None.
+    bound : str, optional
+        The lower bound used for pruning, 'mst' (minimum spanning tree) or 'edges' (shortest
+        edge into each remaining location).
+        The default is 'mst'.
+
+    Yields
+    ------
+    route : list of int
+        The indices of the locations in the order they are visited.
+    distance : float
+        The length of the route.
+
+    """
+    weights = np.where(np.isinf(distances), np.inf, -distances if longest else distances).tolist()
+    sign = -1 if longest else 1
+
+    incumbent = Incumbent(*nearest_neighbour(weights)[::-1])
+    if incumbent.route is not None:
+        yield incumbent.route, sign*incumbent.cost
+
+    if len(weights) < 2:
+        return
+
+    symmetric = np.array_equal(distances, np.transpose(distances))
+    if processes is None:
+        for start in range(len(weights)):
+            remaining = set(range(len(weights))) - {start}
+            for cost, route in search(weights, [start], 0, remaining, incumbent,
+                                      lower_bound(weights, bound, symmetric), symmetric):
+                yield list(route), sign*cost
+        return
+
+    shared = Value('d', incumbent.cost)
+    # with symmetric distances, skip the subtrees in which no route can end above its start
+    starts = sorted(((a, b) for a in range(len(weights)) for b in range(len(weights))
+                     if a != b and weights[a][b] != np.inf
+                     and not (symmetric and a > max(set(range(len(weights))) - {a, b}, default=b))),
+                    key=lambda start : weights[start[0]][start[1]])
+    with Pool(processes, initializer=init_worker, initargs=(shared,)) as pool:
+        tasks = ((weights, start, bound, symmetric) for start in starts)
+        for result in pool.imap_unordered(search_subtree, tasks):
+            if result is not None and result[0] < incumbent.cost:
+                incumbent.cost, incumbent.route = result
+                yield list(incumbent.route), sign*incumbent.cost
+
+def branch_and_bound(distances, longest=False, processes=None, bound='mst'):
+    """
+    Finds the shortest (or longest) route visiting every location exactly once by branch and
+    bound, see branch_and_bound_routes.
+
+    Parameters
+    ----------
+    distances : numpy.ndarray of float
+        The distance between each pair of locations, with inf where there is no route.
+    longest : bool, optional
+        Whether to find the longest route rather than the shortest.
+        The default is False.
+    processes : int or None, optional
+        Number of worker processes to use, or None to search in this process.
+        The default is None.
+    bound : str, optional
+        The lower bound used for pruning, 'mst' or 'edges'.
+        The default is 'mst'.
+
+    Returns
+    -------
+    route : list of int
+        The indices of the locations in the order they are visited, or None if no route
+        visits every location.
+    distance : float
+        The length of the route.
+
+    """
+    route, distance = None, np.inf
+    for route, distance in branch_and_bound_routes(distances, longest, processes, bound):
+        pass
+
+    return route, distance
 
-    for route in permutations(distances):
-        dist = 0
-        for i in range(len(route) - 1):
-            dist += distances[route[i]][route[i+1]]
-        if dist > longest_distance:
-            longest_route, longest_distance = route, dist
+def Day9_BranchAndBound(filename='Inputs/Day9_Inputs.txt', longest=False, processes=None,
+                        bound='mst'):
+    """
+    Calculates the shortest (or longest) possible route between a set of locations while
+    visiting each location exactly once, given the distances between every location in an input
+    file, exactly using branch and bound.
+
+    Parameters
+    ----------
+    filename : str, optional
+        Input file containing the distances between locations.
+        The default is 'Inputs/Day9_Inputs.txt'.
+    longest : bool, optional
+        Whether to find the longest route rather than the shortest.
+        The default is False.
+    processes : int or None, optional
+        Number of worker processes to use, or None to search in this process.
+        The default is None.
+    bound : str, optional
+        The lower bound used for pruning, 'mst' or 'edges'.
+        The default is 'mst'.
+
+    Returns
+    -------
+    route : list of str
+        The route through every location in order.
+    distance : int
+        The length of the route.
+
+    """
+    locations, distances = read_distances(filename)
+    route, distance = branch_and_bound(distances, longest, processes, bound)
 
-    return list(longest_route), longest_distance
+    return [locations[i] for i in route], int(distance)
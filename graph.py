@@ -0,0 +1,248 @@
+import numpy as np
+from itertools import islice, permutations
+
+class WeightedGraph:
+    """
+    Class describing a complete weighted graph between named nodes, with the names interned to
+    integer indices and the weights held in a contiguous matrix so that routes can be scored in
+    batches by fancy indexing. The matrix is allocated with spare capacity, doubled whenever a
+    new node does not fit, so that nodes can be added one at a time in amortised O(n) each.
+    """
+    def __init__(self, names=(), fill=np.inf):
+        """
+        Initialise the class with two parameters.
+
+        Parameters
+        ----------
+        names : iterable of str, optional
+            The names of the nodes, in index order.
+            The default is ().
+        fill : float, optional
+            The weight of every edge which has not been given, except from a node to itself
+            which is 0.
+            The default is inf.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.names = list(dict.fromkeys(names))
+        self.index = {name : i for i, name in enumerate(self.names)}
+        self.fill = fill
+        self._weights = np.full((len(self.names), len(self.names)), fill, dtype=float)
+        np.fill_diagonal(self._weights, 0)
+
+    def __repr__(self):
+        """
+        Return the representation of a WeightedGraph object.
+
+        Returns
+        -------
+        str
+            Representation.
+
+        """
+        return f'{self.__class__.__name__}({self.names})'
+
+    def __len__(self):
+        """
+        Return the number of nodes in the graph.
+
+        Returns
+        -------
+        int
+            The number of nodes.
+
+        """
+        return len(self.names)
+
+    @property
+    def weights(self):
+        """
+        The weight of the edge between each pair of nodes, as a view of the occupied part of the
+        matrix.
+
+        Returns
+        -------
+        numpy.ndarray of float
+            The weights, with shape (number of nodes, number of nodes).
+
+        """
+        return self._weights[:len(self.names), :len(self.names)]
+
+    @classmethod
+    def from_edges(cls, edges, symmetric=False, fill=np.inf):
+        """
+        Create a WeightedGraph from a list of weighted edges, with nodes indexed in order of
+        first appearance.
+
+        Parameters
+        ----------
+        edges : iterable of tuple
+            The start (str), end (str) and weight (int or float) of each edge.
+        symmetric : bool, optional
+            Whether each edge also gives the weight in the opposite direction.
+            The default is False.
+        fill : float, optional
+            The weight of every edge which has not been given.
+            The default is inf.
+
+        Returns
+        -------
+        WeightedGraph
+            The graph of the edges.
+
+        """
+        edges = list(edges)
+        graph = cls(dict.fromkeys(name for start, end, weight in edges for name in (start, end)), fill)
+        for start, end, weight in edges:
+            graph.add_edge(start, end, weight, symmetric)
+
+        return graph
+
+    def intern(self, name):
+        """
+        Returns the index of a node, adding it to the graph if it is new.
+
+        Parameters
+        ----------
+        name : str
+            The name of the node.
+
+        Returns
+        -------
+        int
+            The index of the node.
+
+        """
+        if name not in self.index:
+            n = len(self.names)
+            if n == len(self._weights):
+                capacity = max(1, 2*n)
+                weights = np.full((capacity, capacity), self.fill, dtype=float)
+                weights[:n, :n] = self.weights
+                weights[np.arange(n, capacity), np.arange(n, capacity)] = 0
+                self._weights = weights
+            self.index[name] = n
+            self.names.append(name)
+
+        return self.index[name]
+
+    def add_edge(self, start, end, weight, symmetric=False):
+        """
+        Sets the weight of an edge, adding its nodes to the graph if they are new.
+
+        Parameters
+        ----------
+        start : str
+            The node the edge starts at.
+        end : str
+            The node the edge ends at.
+        weight : int or float
+            The weight of the edge.
+        symmetric : bool, optional
+            Whether to also set the weight in the opposite direction.
+            The default is False.
+
+        Returns
+        -------
+        None.
+
+        """
+        i, j = self.intern(start), self.intern(end)
+        self.weights[i, j] = weight
+        if symmetric:
+            self.weights[j, i] = weight
+
+    def symmetrised(self):
+        """
+        Returns a graph over the same nodes in which the weight of each edge is the sum of its
+        weights in both directions.
+
+        Returns
+        -------
+        WeightedGraph
+            The symmetrised graph.
+
+        """
+        graph = self.__class__(self.names, self.fill)
+        graph._weights = self.weights + self.weights.T
+
+        return graph
+
+    def route_weights(self, routes, closed=False):
+        """
+        Calculates the total weight of a batch of routes at once.
+
+        Parameters
+        ----------
+        routes : numpy.ndarray of int
+            The node indices of each route, with shape (number of routes, route length).
+        closed : bool, optional
+            Whether each route returns from its last node to its first.
+            The default is False.
+
+        Returns
+        -------
+        totals : numpy.ndarray of float
+            The total weight of each route.
+
+        """
+        totals = self.weights[routes[:, :-1], routes[:, 1:]].sum(axis=1)
+        if closed:
+            totals += self.weights[routes[:, -1], routes[:, 0]]
+
+        return totals
+
+    def best_route(self, longest=False, closed=False, fixed_last=None, batch_size=2**16):
+        """
+        Finds the route through every node with the lowest (or highest) total weight by scoring
+        every permutation of the nodes, in batches. Routes with a non-finite total, i.e. which use
+        a missing edge of weight inf, are never chosen. Where routes tie, the first in permutation
+        order is returned.
+
+        Parameters
+        ----------
+        longest : bool, optional
+            Whether to find the route with the highest total weight.
+            The default is False.
+        closed : bool, optional
+            Whether each route returns from its last node to its first.
+            The default is False.
+        fixed_last : int or None, optional
+            A node fixed at the end of every route, e.g. to skip rotations of closed routes.
+            The default is None.
+        batch_size : int, optional
+            The number of permutations scored at a time.
+            The default is 2**16.
+
+        Returns
+        -------
+        best_route : list of int or None
+            The node indices of the best route in order, or None if every route has a
+            non-finite total.
+        best_total : float
+            The total weight of the best route.
+
+        """
+        nodes = [node for node in range(len(self)) if node != fixed_last]
+        orderings = permutations(nodes)
+        sign = -1 if longest else 1
+        best_route, best_score = None, np.inf
+
+        batch = list(islice(orderings, batch_size))
+        while batch:
+            routes = np.array(batch, dtype=np.intp).reshape(len(batch), len(nodes))
+            if fixed_last is not None:
+                routes = np.hstack([routes, np.full((len(batch), 1), fixed_last, dtype=np.intp)])
+            totals = self.route_weights(routes, closed)
+            scores = np.where(np.isfinite(totals), sign*totals, np.inf)
+            best = int(np.argmin(scores))
+            if scores[best] < best_score:
+                best_route, best_score = routes[best].tolist(), float(scores[best])
+            batch = list(islice(orderings, batch_size))
+
+        best_total = sign*best_score if best_route is not None else np.inf
+
+        return best_route, best_total
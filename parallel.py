@@ -0,0 +1,33 @@
+from collections import deque
+
+def bounded_imap(pool, function, tasks, max_pending):
+    """
+    Generator which applies a function to every task across a pool of processes, yielding the
+    results in task order. Unlike Pool.imap, which consumes its whole input up front, tasks are
+    only taken from the iterable as results are collected, so at most max_pending tasks are in
+    flight at once and tasks can be read lazily from a large file or an endless generator.
+
+    Parameters
+    ----------
+    pool : multiprocessing.pool.Pool
+        The pool of worker processes.
+    function : function
+        The function to apply, taking a single task.
+    tasks : iterable
+        The tasks to apply the function to.
+    max_pending : int
+        The maximum number of tasks submitted to the pool but not yet collected.
+
+    Yields
+    ------
+    result
+        The result of the function for the next task.
+
+    """
+    pending = deque()
+    for task in tasks:
+        pending.append(pool.apply_async(function, (task,)))
+        if len(pending) >= max_pending:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()